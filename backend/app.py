@@ -1,18 +1,42 @@
-from flask import Flask, render_template
+import os
+import tempfile
+from flask import Flask, Request, jsonify, render_template
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 from routes.documents import documents_bp
 from routes.ai import ai_bp
 from routes.voice import voice_bp
 from routes.sessions import sessions_bp
 
+# Recorded answers are kept in memory up to this size and only spill to a temporary file beyond
+# it (werkzeug's default spills at 500 KB, i.e. most recordings). Other uploads, bulk document
+# uploads in particular, keep werkzeug's default so a request cannot hold hundreds of MB in RAM.
+SPEECH_UPLOAD_SPOOL_MAX_BYTES = int(os.getenv('SPEECH_UPLOAD_SPOOL_MAX_BYTES', str(8 * 1024 * 1024)))
+SPEECH_UPLOAD_ENDPOINTS = ('voice.speech_to_text',)
+
+
+class SpoolingRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint in SPEECH_UPLOAD_ENDPOINTS:
+            return tempfile.SpooledTemporaryFile(max_size=SPEECH_UPLOAD_SPOOL_MAX_BYTES, mode='rb+')
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
 app = Flask(__name__)
+app.request_class = SpoolingRequest
 CORS(app)  # Enable CORS for frontend integration
+# Hard cap on any request body; werkzeug rejects larger bodies before buffering them
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', str(25 * 1024 * 1024)))
 
 app.register_blueprint(documents_bp, url_prefix='/api')
 app.register_blueprint(ai_bp, url_prefix='/api/ai')
 app.register_blueprint(voice_bp, url_prefix='/api/voice')
 app.register_blueprint(sessions_bp, url_prefix='/api/sessions')
 
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return jsonify({'error': 'Request body too large'}), 413
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -0,0 +1,93 @@
+"""
+Benchmark DOCX text extraction: the original python-docx path against the
+streaming iterparse extractor, with and without an early-exit character cap.
+
+Builds resume-like documents (headings, bullet paragraphs and a skills
+table per section) of increasing size with python-docx. The streaming
+extractor also returns table text, so its character count is higher.
+
+Usage (from backend/):
+    python benchmarks/bench_docx_extraction.py [--sections 10 100 1000] [--repeat 3] [--memory]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from docx import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.document_processor import extract_text_from_docx  # noqa: E402
+
+
+def legacy_extract_text_from_docx(filepath):
+    # Original implementation, kept here for comparison
+    doc = Document(filepath)
+    return '\n'.join([para.text for para in doc.paragraphs])
+
+
+def build_docx(section_count, path):
+    doc = Document()
+    doc.add_heading('Jane Doe', 0)
+    for index in range(section_count):
+        doc.add_heading(f'Role {index} - Example Corp', level=2)
+        for bullet in range(5):
+            doc.add_paragraph(
+                f'Delivered project {index}.{bullet} using Python, Flask and PostgreSQL, '
+                'improving reliability and cutting response times for customers.',
+                style='List Bullet'
+            )
+        table = doc.add_table(rows=3, cols=3)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = 'Kubernetes, Docker, Terraform'
+    doc.save(path)
+
+
+def measure(func, repeat, trace_memory=False):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+
+    peak = 0
+    if trace_memory:
+        # Separate run so tracing overhead does not skew the timings
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sections', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-chars', type=int, default=4000)
+    parser.add_argument('--memory', action='store_true', help='also report peak traced memory (slow)')
+    args = parser.parse_args()
+
+    print(f"{'sections':>8} {'KiB':>7} {'variant':<22} {'best ms':>10} {'peak KiB':>10} {'chars':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for section_count in args.sections:
+            path = os.path.join(workdir, f'bench_{section_count}.docx')
+            build_docx(section_count, path)
+            size = os.path.getsize(path) / 1024
+
+            variants = [
+                ('python-docx', lambda: legacy_extract_text_from_docx(path)),
+                ('streaming iterparse', lambda: extract_text_from_docx(path)),
+                (f'early exit {args.max_chars}', lambda: extract_text_from_docx(path, max_chars=args.max_chars)),
+            ]
+            for name, func in variants:
+                seconds, peak, text = measure(func, args.repeat, args.memory)
+                print(f"{section_count:>8} {size:>7.0f} {name:<22} {seconds * 1000:>10.1f} {peak / 1024:>10.0f} {len(text):>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark speech-to-text engines: recognition latency and word error rate
+(WER) per engine on the sample set in benchmarks/stt_samples.
+
+Each sample goes through the same path as an upload (decode to 16 kHz mono,
+then VAD trimming unless --no-vad), so latency is recognition time only.
+Engines that are not installed or configured (pocketsphinx, vosk plus
+VOSK_MODEL_PATH, faster-whisper) are skipped.
+
+No audio is bundled with the repository. Samples whose manifest source is
+"gtts" are synthesized from their reference text with --synthesize, which
+needs network access once; without it (e.g. offline) they are skipped.
+Synthetic speech is clean, evenly paced and noise free, so the WER it
+yields is optimistic: good for comparing engines and latency, not for
+estimating accuracy on real candidates. For that, add real recordings with
+source "recording" to the manifest and run with --recorded-only.
+
+Usage (from backend/):
+    python benchmarks/bench_stt_engines.py [--engines google sphinx vosk whisper] [--synthesize]
+                                           [--recorded-only]
+"""
+import argparse
+import io
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import speech_recognition as sr  # noqa: E402
+
+from services.audio_transcoder import decode_to_audio_data  # noqa: E402
+from services.stt_engines import ENGINES, SpeechEngineError, create_engine  # noqa: E402
+from services.voice_activity import trim_silence  # noqa: E402
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stt_samples', 'manifest.json')
+
+
+def normalize_words(text):
+    return re.sub(r"[^a-z0-9' ]+", ' ', text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    # Word-level Levenshtein distance: substitutions + deletions + insertions
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def synthesize_sample(text, path):
+    from gtts import gTTS
+
+    buffer = io.BytesIO()
+    gTTS(text=text, lang='en').write_to_fp(buffer)
+    audio_data = decode_to_audio_data(buffer.getvalue())
+    with wave.open(path, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(audio_data.sample_width)
+        out.setframerate(audio_data.sample_rate)
+        out.writeframes(audio_data.get_raw_data())
+
+
+def load_samples(manifest_path, synthesize, use_vad, recorded_only=False):
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    root = os.path.dirname(manifest_path)
+
+    samples = []
+    for entry in manifest['samples']:
+        synthetic = entry.get('source', 'gtts') == 'gtts'
+        if recorded_only and synthetic:
+            continue
+        path = os.path.join(root, entry['audio'])
+        if not os.path.exists(path):
+            if not synthetic:
+                print(f"Skipping {entry['audio']}: recording missing")
+                continue
+            if not synthesize:
+                print(f"Skipping {entry['audio']}: file missing (use --synthesize)")
+                continue
+            print(f"Synthesizing {entry['audio']}")
+            try:
+                synthesize_sample(entry['text'], path)
+            except Exception as e:
+                print(f"Skipping {entry['audio']}: synthesis failed, gTTS needs network access ({e})")
+                continue
+        with open(path, 'rb') as f:
+            audio_data = decode_to_audio_data(f.read())
+        if use_vad:
+            audio_data, _ = trim_silence(audio_data)
+        duration = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        samples.append((entry['audio'], entry['text'], audio_data, duration, synthetic))
+    return samples
+
+
+def run_engine(engine, samples):
+    latencies = []
+    errors = 0
+    words = 0
+    audio_seconds = 0.0
+    for name, reference, audio_data, duration, _ in samples:
+        started = time.perf_counter()
+        try:
+            hypothesis = engine.recognize(audio_data)
+        except sr.UnknownValueError:
+            hypothesis = ''
+        except sr.RequestError as e:
+            print(f"  {engine.name}: {name} failed: {e}")
+            hypothesis = ''
+        latencies.append(time.perf_counter() - started)
+        audio_seconds += duration
+
+        reference_words = normalize_words(reference)
+        errors += word_errors(reference_words, normalize_words(hypothesis))
+        words += len(reference_words)
+    return latencies, errors / max(words, 1), sum(latencies) / max(audio_seconds, 1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST)
+    parser.add_argument('--synthesize', action='store_true', help='create missing clips with gTTS')
+    parser.add_argument('--no-vad', action='store_true', help='recognize untrimmed audio')
+    parser.add_argument('--recorded-only', action='store_true', help='skip gTTS samples, use real recordings only')
+    args = parser.parse_args()
+
+    samples = load_samples(args.manifest, args.synthesize, not args.no_vad, args.recorded_only)
+    if not samples:
+        print('No samples to benchmark')
+        return
+    synthetic = sum(sample[4] for sample in samples)
+    print(f"{len(samples)} samples ({synthetic} synthesized with gTTS), "
+          f"{sum(sample[3] for sample in samples):.1f}s of audio")
+    if synthetic:
+        print("Note: WER on synthetic speech is optimistic; see the manifest description")
+
+    print(f"{'engine':<10} {'load s':>7} {'mean ms':>9} {'p50 ms':>8} {'max ms':>8} {'RTF':>6} {'WER':>7}")
+    for name in args.engines:
+        started = time.perf_counter()
+        try:
+            engine = create_engine(name)
+        except SpeechEngineError as e:
+            print(f"{name:<10} skipped: {e}")
+            continue
+        load_seconds = time.perf_counter() - started
+
+        latencies, wer, real_time_factor = run_engine(engine, samples)
+        print(f"{name:<10} {load_seconds:>7.2f} {statistics.mean(latencies) * 1000:>9.0f} "
+              f"{statistics.median(latencies) * 1000:>8.0f} {max(latencies) * 1000:>8.0f} "
+              f"{real_time_factor:>6.2f} {wer:>7.1%}")
+
+
+if __name__ == '__main__':
+    main()
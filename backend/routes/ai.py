@@ -1,9 +1,19 @@
-from flask import Blueprint, request, jsonify
+import json
+import os
+from itertools import chain
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from services.gemini_service import GeminiService
+from services.request_scheduler import SchedulerBusyError
+from routes.responses import busy_response
 
 ai_bp = Blueprint('ai', __name__)
 gemini_service = GeminiService()
 
+BATCH_MAX_CANDIDATES = int(os.getenv('BATCH_MAX_CANDIDATES', '500'))
+
+def _is_text(value):
+    return isinstance(value, str) and bool(value.strip())
+
 @ai_bp.route('/generate-questions', methods=['POST'])
 def generate_questions():
     """
@@ -19,11 +29,14 @@ def generate_questions():
             return jsonify({'error': 'Resume text and job description are required'}), 400
         
         questions = gemini_service.generate_interview_questions(
-            resume_text, job_description, experience_level
+            resume_text, job_description, experience_level,
+            session_id=data.get('session_id'), endpoint=request.endpoint
         )
         
         return jsonify(questions), 200
     
+    except SchedulerBusyError as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -39,9 +52,80 @@ def analyze_interview():
         if not interview_data.get('conversation'):
             return jsonify({'error': 'Interview conversation data is required'}), 400
         
-        analysis = gemini_service.analyze_interview_performance(interview_data)
+        analysis = gemini_service.analyze_interview_performance(
+            interview_data, session_id=data.get('session_id'), endpoint=request.endpoint
+        )
         
         return jsonify(analysis), 200
     
+    except SchedulerBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/generate-questions/batch', methods=['POST'])
+def generate_questions_batch():
+    """
+    Generate interview questions for many candidates at once.
+    Streams one NDJSON line per candidate as results finish.
+    """
+    try:
+        data = request.get_json() or {}
+        candidates = data.get('candidates')
+        
+        if not isinstance(candidates, list) or not candidates:
+            return jsonify({'error': 'A non-empty list of candidates is required'}), 400
+        if len(candidates) > BATCH_MAX_CANDIDATES:
+            return jsonify({'error': f'At most {BATCH_MAX_CANDIDATES} candidates per batch'}), 400
+        
+        valid = []
+        invalid = []
+        for index, candidate in enumerate(candidates):
+            if not (isinstance(candidate, dict) and _is_text(candidate.get('resume_text'))
+                    and _is_text(candidate.get('job_description'))):
+                invalid.append({
+                    'index': index,
+                    'status': 'error',
+                    'error': 'Resume text and job description must be non-empty strings'
+                })
+                continue
+            valid.append((index, {
+                'resume_text': candidate['resume_text'],
+                'job_description': candidate['job_description'],
+                'experience_level': candidate.get('experience_level', 'intermediate')
+            }))
+        
+        ids = {index: candidate.get('id') for index, candidate in enumerate(candidates)
+               if isinstance(candidate, dict) and 'id' in candidate}
+        
+        endpoint = request.endpoint
+        
+        def generate():
+            results = iter(invalid)
+            if valid:
+                results = chain(results, gemini_service.generate_interview_questions_batch(
+                    valid, endpoint=endpoint
+                ))
+            for result in results:
+                if result['index'] in ids:
+                    result['id'] = ids[result['index']]
+                yield json.dumps(result) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@ai_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Gemini scheduler state plus token and latency usage per endpoint
+    """
+    try:
+        return jsonify({
+            'scheduler': gemini_service.scheduler.metrics(),
+            'usage': gemini_service.tracker.snapshot()
+        }), 200
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,33 +1,317 @@
+import json
 import os
-from flask import Blueprint, request, jsonify
-from werkzeug.utils import secure_filename
-from services.document_processor import extract_text_from_file
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Blueprint, Response, request, jsonify, stream_with_context, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+from services.document_processor import (
+    EXTRACTION_WORKERS, PDF_MAX_PAGES, ExtractionTimeoutError, count_pdf_pages, extract_text_from_file, normalize_text
+)
+from services.extraction_cache import ExtractionCache
+from services.extraction_jobs import ExtractionJobs, is_valid_callback_url
+from services.resume_parser import PARSER_VERSION, parse_resume
+from services.session_store import session_manager
+from services.upload_store import UploadStore, UploadTooLargeError, format_size
 
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
+# Run extraction in the worker process pool instead of the request thread
+USE_PROCESS_POOL = os.getenv('EXTRACTION_USE_PROCESS_POOL', 'false').lower() in ('1', 'true', 'yes')
 documents_bp = Blueprint('documents', __name__)
 
 UPLOAD_FOLDER = 'uploads'
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+# Allowance for multipart boundaries and headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+upload_store = UploadStore(UPLOAD_FOLDER, UPLOAD_MAX_BYTES)
+extraction_cache = ExtractionCache(os.path.join(UPLOAD_FOLDER, '.extracted'))
+# Extraction options that change the output are part of the cache key
+EXTRACTION_VARIANT = f"p{PDF_MAX_PAGES or 0}"
+
+# Bulk upload settings; the request limit replaces MAX_CONTENT_LENGTH for that route only
+BULK_MAX_FILES = int(os.getenv('BULK_MAX_FILES', '200'))
+BULK_MAX_CONTENT_LENGTH = int(os.getenv('BULK_MAX_CONTENT_LENGTH', str(500 * 1024 * 1024)))
+BULK_USE_PROCESS_POOL = os.getenv('BULK_USE_PROCESS_POOL', 'true').lower() in ('1', 'true', 'yes')
+# Largest non-file form field (e.g. job_description) accepted in a bulk upload
+BULK_MAX_FIELD_BYTES = int(os.getenv('BULK_MAX_FIELD_BYTES', str(1024 * 1024)))
+bulk_executor = ThreadPoolExecutor(max_workers=EXTRACTION_WORKERS, thread_name_prefix='bulk-extract')
+
+# Uploads at least this large are extracted in the background (0 = only when async is requested)
+ASYNC_EXTRACTION_THRESHOLD = int(os.getenv('ASYNC_EXTRACTION_THRESHOLD', str(2 * 1024 * 1024)))
+extraction_jobs = ExtractionJobs(
+    max_workers=int(os.getenv('ASYNC_EXTRACTION_WORKERS', '2')),
+    retention_seconds=int(os.getenv('ASYNC_JOB_RETENTION', '3600'))
+)
 
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def is_truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+def process_document(stored, extension, parse_sections=False, use_process_pool=USE_PROCESS_POOL):
+    """
+    Return the extraction cache entry of a stored upload, extracting,
+    normalizing and (optionally) parsing it on a cache miss.
+    Returns (entry, cached).
+    """
+    sha256 = stored['sha256']
+    entry = extraction_cache.get(sha256, extension, EXTRACTION_VARIANT)
+    cached = entry is not None
+    if not cached:
+        raw_text = extract_text_from_file(stored['path'], use_process_pool=use_process_pool)
+        text, normalization = normalize_text(raw_text)
+        entry = {'text': text, 'normalization': normalization}
+        if extension == 'pdf':
+            entry['page_count'] = count_pdf_pages(stored['path'])
+    
+    # Sections are parsed once per document and stored alongside its text
+    needs_parse = parse_sections and (entry.get('resume') or {}).get('version') != PARSER_VERSION
+    if needs_parse:
+        entry['resume'] = parse_resume(entry['text'])
+    if not cached or needs_parse:
+        extraction_cache.put(sha256, extension, entry, EXTRACTION_VARIANT)
+    return entry, cached
+
+def document_result(entry, sha256, cached, parse_sections=False):
+    result = {'text': entry['text'], 'sha256': sha256, 'page_count': entry.get('page_count'),
+              'normalization': entry.get('normalization'), 'cached': cached}
+    if parse_sections and 'resume' in entry:
+        result['resume'] = entry['resume']
+    return result
+
 @documents_bp.route('/upload', methods=['POST'])
 def upload_document():
-    if 'file' not in request.files:
+    """
+    Upload one document (form field "file"). The multipart body is parsed
+    as it arrives and the file is written straight into the upload store,
+    so the size cap applies while the bytes are read, with or without a
+    Content-Length.
+    """
+    too_large = f'File exceeds the {format_size(UPLOAD_MAX_BYTES)} upload limit'
+    # Reject oversized bodies from Content-Length before reading; chunked ones stop at the same limit
+    request.max_content_length = UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD
+    if request.content_length is not None and request.content_length > request.max_content_length:
+        return jsonify({'error': too_large}), 413
+    boundary = request.mimetype_params.get('boundary')
+    if request.mimetype != 'multipart/form-data' or not boundary:
+        return jsonify({'error': 'No file part'}), 400
+    try:
+        form, files = read_upload_form(request.stream, boundary, 'file', max_files=1, raise_too_large=True)
+    except (UploadTooLargeError, RequestEntityTooLarge):
+        return jsonify({'error': too_large}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not files:
         return jsonify({'error': 'No file part'}), 400
-    file = request.files['file']
-    if file.filename == '':
+    result, stored, extension = files[0]
+    if not result['filename']:
         return jsonify({'error': 'No selected file'}), 400
-    if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+    if stored is not None:
+        filename = result['filename']
         try:
-            text = extract_text_from_file(filepath)
-            return jsonify({'text': text}), 200
+            callback_url = form.get('callback_url')
+            if callback_url and not is_valid_callback_url(callback_url):
+                return jsonify({'error': 'callback_url must be an http(s) URL on a public or allowed host'}), 400
+            
+            parse_sections = is_truthy(form.get('parse_sections', 'false'))
+            run_async = (is_truthy(form.get('async', 'false'))
+                         or (ASYNC_EXTRACTION_THRESHOLD and stored['size'] >= ASYNC_EXTRACTION_THRESHOLD))
+            if run_async and extraction_cache.get(stored['sha256'], extension, EXTRACTION_VARIANT) is None:
+                # The document id is its content hash; the text is read back from the extraction cache
+                def extract():
+                    entry, _ = process_document(stored, extension, parse_sections)
+                    return {'extension': extension, 'page_count': entry.get('page_count')}
+                
+                job = extraction_jobs.submit(stored['sha256'], extract, filename, callback_url)
+                status_url = url_for('documents.get_document', document_id=stored['sha256'])
+                return jsonify({'document_id': stored['sha256'], 'status': job['status'],
+                                'size': stored['size'], 'status_url': status_url}), 202, {'Location': status_url}
+            
+            entry, cached = process_document(stored, extension, parse_sections)
+            result = document_result(entry, stored['sha256'], cached, parse_sections)
+            result['size'] = stored['size']
+            return jsonify(result), 200
+        except ExtractionTimeoutError as e:
+            return jsonify({'error': str(e)}), 422
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     else:
         return jsonify({'error': 'Invalid file type'}), 400
+
+@documents_bp.route('/documents/<document_id>', methods=['GET'])
+def get_document(document_id):
+    """
+    Status of an asynchronous extraction; includes the text once completed
+    """
+    try:
+        job = extraction_jobs.get(document_id)
+        if job and job['status'] != 'completed':
+            return jsonify(job), 200
+        
+        extensions = [job['result']['extension']] if job else sorted(ALLOWED_EXTENSIONS)
+        for extension in extensions:
+            entry = extraction_cache.get(document_id, extension, EXTRACTION_VARIANT)
+            if entry is not None:
+                result = document_result(entry, document_id, cached=True, parse_sections=True)
+                result.update({'document_id': document_id, 'status': 'completed'})
+                if job:
+                    result.update({'filename': job['filename'], 'finished_at': job['finished_at']})
+                return jsonify(result), 200
+        return jsonify({'error': 'Document not found'}), 404
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def iter_multipart_events(stream, boundary, chunk_size=64 * 1024):
+    """
+    Decode a multipart/form-data body from stream as it is read, yielding
+    werkzeug's Field/File headers and the Data chunks that follow them
+    """
+    decoder = MultipartDecoder(boundary.encode('latin-1'), max_form_memory_size=BULK_MAX_FIELD_BYTES)
+    while True:
+        chunk = stream.read(chunk_size)
+        decoder.receive_data(chunk or None)
+        event = decoder.next_event()
+        while not isinstance(event, NeedData):
+            if isinstance(event, Epilogue):
+                return
+            yield event
+            event = decoder.next_event()
+        if not chunk:
+            raise ValueError('Upload ended before the multipart body was complete')
+
+def read_upload_form(stream, boundary, file_field='files', max_files=BULK_MAX_FILES, raise_too_large=False):
+    """
+    Read an upload body, writing each file_field part into the upload store
+    while its bytes arrive, so no file is buffered in memory or in a
+    temporary spool first. Returns (form fields, [(result, stored, extension)]);
+    stored is None for files that were rejected. A file over the size cap
+    is recorded as an error, or raises UploadTooLargeError with
+    raise_too_large.
+    """
+    form = {}
+    files = []
+    field = None   # (name, bytearray) of the field being read
+    writer = None  # UploadWriter of the file being read
+    try:
+        for event in iter_multipart_events(stream, boundary):
+            if isinstance(event, Field):
+                field = (event.name, bytearray())
+            elif isinstance(event, File):
+                field = None
+                if event.name != file_field or (not event.filename and max_files > 1):
+                    continue
+                if len(files) >= max_files:
+                    raise ValueError(f'At most {max_files} files per upload')
+                result = {'index': len(files), 'filename': event.filename}
+                if not event.filename:
+                    files.append([result, None, None])
+                elif allowed_file(event.filename):
+                    extension = event.filename.rsplit('.', 1)[1].lower()
+                    writer = upload_store.open_writer(extension)
+                    files.append([result, None, extension])
+                else:
+                    result.update({'status': 'error', 'error': 'Invalid file type'})
+                    files.append([result, None, None])
+            elif isinstance(event, Data):
+                if field is not None:
+                    field[1].extend(event.data)
+                    if len(field[1]) > BULK_MAX_FIELD_BYTES:
+                        raise ValueError(f'Form field {field[0]} is too large')
+                    if not event.more_data:
+                        form[field[0]] = field[1].decode('utf-8', 'replace')
+                        field = None
+                elif writer is not None:
+                    try:
+                        writer.write(event.data)
+                    except UploadTooLargeError as e:
+                        writer.discard()
+                        writer = None
+                        if raise_too_large:
+                            raise
+                        files[-1][0].update({'status': 'error', 'error': str(e)})
+                        continue
+                    if not event.more_data:
+                        files[-1][1] = writer.commit()
+                        writer = None
+    finally:
+        if writer is not None:
+            writer.discard()
+    return form, files
+
+@documents_bp.route('/upload/bulk', methods=['POST'])
+def upload_documents_bulk():
+    """
+    Upload many documents (form field "files") in one request.
+    The multipart body is parsed as it arrives and each file is written to
+    the upload store as its bytes are read. Extraction then runs in
+    parallel and one NDJSON line per file is streamed back as each
+    finishes. With create_sessions, a session is created for every
+    extracted resume against the given job description.
+    """
+    try:
+        request.max_content_length = BULK_MAX_CONTENT_LENGTH
+        boundary = request.mimetype_params.get('boundary')
+        if request.mimetype != 'multipart/form-data' or not boundary:
+            return jsonify({'error': 'Expected a multipart/form-data upload'}), 400
+        try:
+            form, files = read_upload_form(request.stream, boundary)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not files:
+            return jsonify({'error': 'No files uploaded'}), 400
+        
+        parse_sections = is_truthy(form.get('parse_sections', 'false'))
+        include_text = is_truthy(form.get('include_text', 'true'))
+        create_sessions = is_truthy(form.get('create_sessions', 'false'))
+        job_title = form.get('job_title', '')
+        job_description = form.get('job_description', '')
+        if create_sessions and (not job_title or not job_description):
+            return jsonify({'error': 'Job title and job description are required to create sessions'}), 400
+        
+        results = []
+        jobs = []
+        for result, stored, extension in files:
+            if stored is None:
+                results.append(result)
+                continue
+            result.update({'sha256': stored['sha256'], 'size': stored['size']})
+            jobs.append((result, stored, extension))
+        
+        def run(result, stored, extension):
+            started = time.perf_counter()
+            try:
+                entry, cached = process_document(stored, extension, parse_sections, BULK_USE_PROCESS_POOL)
+                result.update({'status': 'ok', 'cached': cached, 'page_count': entry.get('page_count'),
+                               'normalization': entry.get('normalization')})
+                if include_text:
+                    result['text'] = entry['text']
+                if parse_sections:
+                    result['resume'] = entry['resume']
+                if create_sessions:
+                    candidate_name = os.path.splitext(result['filename'])[0].replace('_', ' ').replace('-', ' ').strip()
+                    result['session_id'] = session_manager.create_session(
+                        candidate_name, job_title, entry['text'], job_description
+                    )
+            except Exception as e:
+                result.update({'status': 'error', 'error': str(e)})
+            result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            return result
+        
+        futures = [bulk_executor.submit(run, *job) for job in jobs]
+        
+        def generate():
+            for result in results:
+                yield json.dumps(result) + '\n'
+            for future in as_completed(futures):
+                yield json.dumps(future.result()) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,12 @@
+from flask import jsonify
+
+
+def busy_response(error):
+    """
+    503 for a saturated worker pool or Gemini queue, telling the client when
+    to retry
+    """
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
@@ -1,10 +1,14 @@
 from flask import Blueprint, request, jsonify
-from services.session_manager import InterviewSessionManager
 from services.gemini_service import GeminiService
+from services.followup_planner import ADAPTIVE_MAX_SPECULATIVE_CALLS, FollowUpPlanner
+from services.request_scheduler import SchedulerBusyError
+from services.session_store import score_analytics, session_manager, transcript_index
+from routes.responses import busy_response
+from routes.voice import audio_prefetcher, speech_response
 
 sessions_bp = Blueprint('sessions', __name__)
-session_manager = InterviewSessionManager()
 gemini_service = GeminiService()
+followup_planner = FollowUpPlanner(gemini_service, session_manager)
 
 @sessions_bp.route('/create', methods=['POST'])
 def create_session():
@@ -17,12 +21,14 @@ def create_session():
         job_title = data.get('job_title', '')
         resume_text = data.get('resume_text', '')
         job_description = data.get('job_description', '')
+        adaptive = bool(data.get('adaptive', False))
         
         if not candidate_name or not job_title:
             return jsonify({'error': 'Candidate name and job title are required'}), 400
         
         session_id = session_manager.create_session(
-            candidate_name, job_title, resume_text, job_description
+            candidate_name, job_title, resume_text, job_description,
+            adaptive=adaptive, max_speculative_calls=ADAPTIVE_MAX_SPECULATIVE_CALLS
         )
         
         return jsonify({'session_id': session_id}), 201
@@ -62,7 +68,9 @@ def generate_and_add_questions(session_id):
         questions_data = gemini_service.generate_interview_questions(
             session_data.get('resume_text', ''),
             session_data.get('job_description', ''),
-            experience_level
+            experience_level,
+            session_id=session_id,
+            endpoint=request.endpoint
         )
         
         questions = questions_data.get('questions', [])
@@ -71,21 +79,50 @@ def generate_and_add_questions(session_id):
         success = session_manager.add_questions(session_id, questions)
         
         if success:
+            # Synthesize question audio while the candidate reads the first question
+            audio_prefetcher.prefetch(question.get('question') for question in questions)
             return jsonify({'questions': questions}), 200
         else:
             return jsonify({'error': 'Failed to add questions to session'}), 500
             
+    except SchedulerBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@sessions_bp.route('/<session_id>/questions/<int:index>/audio', methods=['GET'])
+def get_question_audio(session_id, index):
+    """
+    Spoken audio of the session's question at position `index`, usually
+    already synthesized in the background when the questions were generated
+    """
+    try:
+        session_data = session_manager.get_session(session_id)
+        if not session_data:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        questions = session_data.get('questions', [])
+        if index >= len(questions) or not questions[index].get('question'):
+            return jsonify({'error': 'Question not found'}), 404
+        
+        return speech_response(questions[index]['question'], request.args.get('language', 'en'))
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @sessions_bp.route('/<session_id>/next-question', methods=['GET'])
 def get_next_question(session_id):
     """
-    Get the next question for the interview
+    Get the next question for the interview.
+    For adaptive sessions this also starts generating a follow-up for the
+    question after it while the candidate answers.
     """
     try:
         question = session_manager.get_next_question(session_id)
         if question:
+            session_data = session_manager.get_session(session_id)
+            if session_data and session_data.get('adaptive'):
+                followup_planner.schedule(session_id, session_data['current_question_index'] + 1)
             return jsonify(question), 200
         else:
             return jsonify({'message': 'No more questions'}), 200
@@ -128,16 +165,21 @@ def complete_interview(session_id):
             return jsonify({'error': 'Session not found'}), 404
         
         # Generate analysis using Gemini
-        analysis = gemini_service.analyze_interview_performance(session_data)
+        analysis = gemini_service.analyze_interview_performance(
+            session_data, session_id=session_id, endpoint=request.endpoint
+        )
         
         # Mark session as completed
         success = session_manager.complete_session(session_id, analysis)
+        gemini_service.release_context(session_id)
         
         if success:
             return jsonify(analysis), 200
         else:
             return jsonify({'error': 'Failed to complete session'}), 500
             
+    except SchedulerBusyError as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -154,6 +196,44 @@ def list_sessions():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@sessions_bp.route('/search', methods=['GET'])
+def search_sessions():
+    """
+    Full-text search over interview questions, answers and analysis feedback
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Search query (q) is required'}), 400
+        
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        results = transcript_index.search(
+            query,
+            job_title=request.args.get('job_title'),
+            status=request.args.get('status'),
+            kind=request.args.get('kind'),
+            limit=limit,
+            offset=offset
+        )
+        return jsonify({'results': results, 'count': len(results)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@sessions_bp.route('/analytics', methods=['GET'])
+def get_analytics():
+    """
+    Score percentiles, histograms and per-category means over completed
+    sessions, optionally for a single job title
+    """
+    try:
+        job_title = request.args.get('job_title')
+        return jsonify(score_analytics.summary(job_title)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @sessions_bp.route('/<session_id>', methods=['DELETE'])
 def delete_session(session_id):
     """
@@ -161,6 +241,7 @@ def delete_session(session_id):
     """
     try:
         success = session_manager.delete_session(session_id)
+        gemini_service.release_context(session_id)
         if success:
             return jsonify({'message': 'Session deleted successfully'}), 200
         else:
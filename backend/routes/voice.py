@@ -1,10 +1,70 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file
+from routes.responses import busy_response
+from services.audio_cache import AudioCache
+from services.audio_prefetcher import AudioPrefetcher
+from services.speech_streams import SpeechStreams
 from services.voice_service import VoiceService
-import tempfile
+from services.worker_pool import WorkerPoolBusy
 import os
 
+AUDIO_CACHE_DIR = os.getenv('AUDIO_CACHE_DIR', 'audio_cache')
+AUDIO_CACHE_MAX_BYTES = int(os.getenv('AUDIO_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+# Cached audio never changes for a key, so clients may keep it for a long time
+AUDIO_CACHE_MAX_AGE = int(os.getenv('AUDIO_CACHE_MAX_AGE', str(7 * 24 * 3600)))
+# Stream cache misses to the client as gTTS produces them instead of synthesizing the whole file first
+TTS_STREAMING = os.getenv('TTS_STREAMING', 'true').lower() in ('1', 'true', 'yes')
+
 voice_bp = Blueprint('voice', __name__)
-voice_service = VoiceService()
+audio_cache = AudioCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES)
+voice_service = VoiceService(audio_cache=audio_cache)
+audio_prefetcher = AudioPrefetcher(voice_service)
+speech_streams = SpeechStreams(voice_service.stt_engine, voice_service.workers)
+
+
+def send_speech(result, as_attachment=False):
+    """
+    Response for a successful text_to_speech_cached result: cacheable by the
+    browser, with ETag revalidation and Range support
+    """
+    response = send_file(
+        result['audio_file'],
+        mimetype='audio/mpeg',
+        as_attachment=as_attachment,
+        download_name='speech.mp3',
+        conditional=True,
+        etag=result['cache_key'],
+        max_age=AUDIO_CACHE_MAX_AGE
+    )
+    response.headers['X-Audio-Cache'] = 'hit' if result['cached'] else 'miss'
+    return response
+
+def speech_response(text, language='en', as_attachment=False):
+    """
+    Audio response for text: cached audio is sent as a file; a miss is
+    streamed chunk by chunk while it is synthesized and cached. Audio that is
+    already being synthesized (e.g. prefetched) is waited for instead.
+    """
+    key = voice_service.speech_cache_key(text, language)
+    try:
+        if not TTS_STREAMING or audio_cache.get(key) is not None or audio_cache.is_pending(key):
+            result = voice_service.text_to_speech_cached(text, language)
+            if not result['success']:
+                return jsonify({'error': result['error']}), 400
+            return send_speech(result, as_attachment)
+        
+        result = voice_service.text_to_speech_stream(text, language)
+    except WorkerPoolBusy as e:
+        return busy_response(e)
+    if not result['success']:
+        return jsonify({'error': result['error']}), 400
+    response = Response(result['chunks'], mimetype='audio/mpeg')
+    response.headers['X-Audio-Cache'] = 'miss'
+    response.headers['Content-Disposition'] = f"{'attachment' if as_attachment else 'inline'}; filename=speech.mp3"
+    # Same ETag as the cached file, so the next conditional request is a 304
+    response.set_etag(result['cache_key'])
+    response.cache_control.public = True
+    response.cache_control.max_age = AUDIO_CACHE_MAX_AGE
+    return response
 
 @voice_bp.route('/speech-to-text', methods=['POST'])
 def speech_to_text():
@@ -19,60 +79,113 @@ def speech_to_text():
         if audio_file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Save uploaded file temporarily
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-        audio_file.save(temp_file.name)
-        temp_file.close()
-        
-        # Convert speech to text
-        result = voice_service.speech_to_text_from_file(temp_file.name)
-        
-        # Cleanup
-        voice_service.cleanup_temp_files(temp_file.name)
+        # Decoded straight from the upload stream whatever the container
+        # (MediaRecorder sends webm/opus); it stays in memory unless very large
+        result = voice_service.speech_to_text_from_stream(audio_file.stream)
         
         if result['success']:
-            return jsonify({'text': result['text']}), 200
+            return jsonify({'text': result['text'], 'vad': result.get('vad'), 'engine': result.get('engine')}), 200
         else:
-            return jsonify({'error': result['error']}), 400
+            return jsonify({'error': result['error'], 'vad': result.get('vad')}), 400
             
+    except WorkerPoolBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@voice_bp.route('/speech-stream', methods=['POST'])
+def create_speech_stream():
+    """
+    Start live recognition of a recording. The client then POSTs raw 16-bit
+    little-endian mono PCM chunks (at sample_rate, default 16000) to the
+    returned chunk_url while the candidate speaks, and the finish_url when
+    they stop.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        stream = speech_streams.create(int(data.get('sample_rate', 16000)))
+        return jsonify({
+            'stream_id': stream.stream_id,
+            'sample_rate': stream.sample_rate,
+            'chunk_url': f"/api/voice/speech-stream/{stream.stream_id}",
+            'finish_url': f"/api/voice/speech-stream/{stream.stream_id}/finish"
+        }), 201
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except WorkerPoolBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@voice_bp.route('/speech-stream/<stream_id>', methods=['POST'])
+def feed_speech_stream(stream_id):
+    """
+    Append an audio chunk. Returns the transcript so far: "text" holds the
+    recognized utterances, "partial" the utterance still being spoken. A 503
+    means the chunk was not taken and should be sent again after Retry-After.
+    """
+    try:
+        stream = speech_streams.get(stream_id)
+        if stream is None:
+            return jsonify({'error': 'Speech stream not found'}), 404
+        
+        return jsonify(stream.feed(request.get_data())), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except WorkerPoolBusy as e:
+        return busy_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@voice_bp.route('/speech-stream/<stream_id>/finish', methods=['POST'])
+def finish_speech_stream(stream_id):
+    """
+    End the recording and return the final transcript. On a 503 the stream
+    stays open and finishing can be retried after Retry-After.
+    """
+    try:
+        stream = speech_streams.get(stream_id)
+        if stream is None:
+            return jsonify({'error': 'Speech stream not found'}), 404
+        
+        result = stream.finish()
+        speech_streams.close(stream_id)
+        return jsonify(result), 200
+        
+    except WorkerPoolBusy as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@voice_bp.route('/text-to-speech', methods=['POST'])
+@voice_bp.route('/speech-stream/<stream_id>', methods=['DELETE'])
+def cancel_speech_stream(stream_id):
+    """
+    Discard a stream without waiting for its transcript
+    """
+    if speech_streams.close(stream_id) is None:
+        return jsonify({'error': 'Speech stream not found'}), 404
+    return jsonify({'message': 'Speech stream cancelled'}), 200
+
+@voice_bp.route('/text-to-speech', methods=['GET', 'POST'])
 def text_to_speech():
     """
-    Convert text to speech audio file
+    Convert text to speech audio file.
+    The first request for a text is streamed while it is synthesized; later
+    ones are served from the audio cache. GET (?text=...&language=...)
+    responses are cacheable by the browser and support conditional and Range
+    requests, so they can be used directly as an audio element source.
     """
     try:
-        data = request.get_json()
+        data = request.args if request.method == 'GET' else request.get_json()
         text = data.get('text', '')
         language = data.get('language', 'en')
         
         if not text:
             return jsonify({'error': 'No text provided'}), 400
         
-        # Generate speech audio file
-        result = voice_service.text_to_speech_file(text, language)
-        
-        if result['success']:
-            audio_file_path = result['audio_file']
-            
-            # Return the audio file
-            response = send_file(
-                audio_file_path,
-                mimetype='audio/mpeg',
-                as_attachment=True,
-                download_name='speech.mp3'
-            )
-            
-            # Schedule cleanup after response
-            @response.call_on_close
-            def cleanup():
-                voice_service.cleanup_temp_files(audio_file_path)
-            
-            return response
-        else:
-            return jsonify({'error': result['error']}), 400
+        return speech_response(text, language, as_attachment=request.method == 'POST')
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -97,6 +210,8 @@ def speak_text():
         else:
             return jsonify({'error': result['error']}), 400
             
+    except WorkerPoolBusy as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -121,5 +236,7 @@ def listen_microphone():
         else:
             return jsonify({'error': result['error']}), 400
             
+    except WorkerPoolBusy as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
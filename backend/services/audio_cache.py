@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+# Bump whenever synthesis output changes so cached audio is not reused
+AUDIO_CACHE_VERSION = 1
+
+
+class AudioCache:
+    """
+    Content-addressed disk cache for synthesized speech.
+
+    Files are named by the SHA-256 of (text, language, voice settings), so
+    replays and the shared fallback questions are synthesized once. The
+    cache is bounded to `max_bytes` on disk and evicts the least recently
+    used files; recency survives restarts through file mtimes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, extension: str = 'mp3'):
+        # Absolute, since Flask's send_file resolves relative paths against the app root
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> [lock, holders and waiters]
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._size = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def make_key(text: str, language: str, settings: Optional[Dict] = None) -> str:
+        payload = json.dumps(
+            {"text": text, "language": language, "settings": settings or {}, "version": AUDIO_CACHE_VERSION},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{self.extension}")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Path of the cached audio for key, or None. Marks the entry as used.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._forget(key)
+            return None
+        return path
+
+    def is_pending(self, key: str) -> bool:
+        """
+        True while key is being synthesized (get_or_create or synthesis_lock)
+        """
+        with self._lock:
+            return key in self._key_locks
+
+    def temp_path(self) -> str:
+        """
+        Path of a new temp file inside the cache directory, for audio that is
+        written incrementally and then moved in with put_file
+        """
+        temp = tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='.part', delete=False)
+        temp.close()
+        return temp.name
+
+    def put_file(self, key: str, source_path: str) -> str:
+        """
+        Move a finished audio file into the cache and return its cached path
+        """
+        path = self.path_for(key)
+        os.replace(source_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = size
+            self._size += size
+            self._evict()
+        return path
+
+    def get_or_create(self, key: str, synthesize: Callable[[str], None]) -> Tuple[str, bool]:
+        """
+        Return (path, hit). On a miss, synthesize(temp_path) writes the audio
+        and the result is cached; concurrent misses for one key synthesize once.
+        """
+        path = self.get(key)
+        if path is not None:
+            return path, True
+
+        with self.synthesis_lock(key):
+            path = self.get(key)
+            if path is not None:
+                return path, True
+            temp_path = self.temp_path()
+            try:
+                synthesize(temp_path)
+                return self.put_file(key, temp_path), False
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    @contextmanager
+    def synthesis_lock(self, key: str):
+        """
+        Hold the per-key lock that get_or_create synthesizes under, for
+        callers that write the audio themselves (temp_path + put_file).
+        Check get(key) again once inside: someone else may have finished it.
+        """
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes}
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._size -= size
+
+    def _evict(self):
+        # Never evict the newest entry, even if it alone exceeds the bound
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def _load(self):
+        suffix = f".{self.extension}"
+        found = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.part'):
+                os.remove(entry.path)
+            elif entry.is_file() and entry.name.endswith(suffix):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-len(suffix)], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._size += size
+        with self._lock:
+            self._evict()
@@ -0,0 +1,55 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+from services.worker_pool import WorkerPoolBusy
+
+AUDIO_PREFETCH_WORKERS = int(os.getenv('AUDIO_PREFETCH_WORKERS', '2'))
+
+
+class AudioPrefetcher:
+    """
+    Synthesizes question audio into the audio cache in the background, so
+    playing a question is a cache hit instead of a gTTS round trip.
+
+    A text already queued is not queued again. A foreground request for a
+    text that is being synthesized waits on the audio cache's per-key lock
+    and then gets the prefetched file, so nothing is synthesized twice.
+    """
+
+    def __init__(self, voice_service, max_workers=AUDIO_PREFETCH_WORKERS):
+        self.voice_service = voice_service
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='audio-prefetch')
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def prefetch(self, texts: Iterable[str], language: str = 'en') -> int:
+        """
+        Queue synthesis of every text that is not cached yet; returns the
+        number of texts queued
+        """
+        queued = 0
+        for text in texts:
+            if not text or self.voice_service.audio_cache is None:
+                continue
+            key = (text, language)
+            with self._lock:
+                if key in self._pending:
+                    continue
+                self._pending.add(key)
+            self.executor.submit(self._synthesize, text, language)
+            queued += 1
+        return queued
+
+    def _synthesize(self, text, language):
+        try:
+            result = self.voice_service.text_to_speech_cached(text, language)
+            if not result['success']:
+                print(f"Error prefetching question audio: {result['error']}")
+        except WorkerPoolBusy:
+            # Interactive requests come first; the audio is synthesized when it is played
+            print("Skipped prefetching question audio: voice workers are busy")
+        finally:
+            with self._lock:
+                self._pending.discard((text, language))
@@ -0,0 +1,114 @@
+import io
+import os
+import shutil
+import subprocess
+
+import speech_recognition as sr
+
+try:
+    import av
+except ImportError:  # PyAV is optional; the ffmpeg binary is used instead
+    av = None
+
+# Speech recognizers work on 16 kHz mono 16-bit PCM; anything more is wasted upload and CPU
+TARGET_SAMPLE_RATE = 16000
+TARGET_SAMPLE_WIDTH = 2
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+TRANSCODE_TIMEOUT = float(os.getenv('TRANSCODE_TIMEOUT', '30'))
+
+# Formats sr.AudioFile reads without an external decoder
+NATIVE_FORMATS = ('wav', 'aiff', 'flac')
+
+
+class TranscodeError(Exception):
+    """
+    Raised when audio cannot be decoded
+    """
+
+
+def sniff_format(data):
+    """
+    Identify an audio container from its leading bytes, regardless of the
+    uploaded file name
+    """
+    header = data[:12]
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return 'wav'
+    if header[:4] == b'FORM' and header[8:12] in (b'AIFF', b'AIFC'):
+        return 'aiff'
+    if header[:4] == b'fLaC':
+        return 'flac'
+    if header[:4] == b'\x1a\x45\xdf\xa3':
+        return 'webm'
+    if header[:4] == b'OggS':
+        return 'ogg'
+    if header[4:8] == b'ftyp':
+        return 'mp4'
+    if header[:3] == b'ID3' or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    return 'unknown'
+
+def decode_to_audio_data(data, sample_rate=TARGET_SAMPLE_RATE):
+    """
+    Decode an audio upload to mono 16-bit PCM at sample_rate and return it
+    as sr.AudioData. data is either bytes or a seekable binary file object,
+    such as an upload's stream, which is read in place rather than copied.
+    WAV/AIFF/FLAC are read directly; other containers (webm/opus from
+    MediaRecorder, ogg, mp3, mp4) are decoded with PyAV if installed,
+    otherwise by piping through ffmpeg. No temporary files are written.
+    """
+    stream = io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+    stream.seek(0)
+    audio_format = sniff_format(stream.read(12))
+    stream.seek(0)
+    if audio_format in NATIVE_FORMATS:
+        with sr.AudioFile(stream) as source:
+            audio_data = sr.Recognizer().record(source)
+        if audio_data.sample_rate == sample_rate and audio_data.sample_width == TARGET_SAMPLE_WIDTH:
+            return audio_data
+        pcm = audio_data.get_raw_data(convert_rate=sample_rate, convert_width=TARGET_SAMPLE_WIDTH)
+    elif av is not None:
+        pcm = _decode_with_pyav(stream, sample_rate)
+    else:
+        pcm = _decode_with_ffmpeg(stream.read(), sample_rate)
+
+    if not pcm:
+        raise TranscodeError(f"No audio could be decoded from the {audio_format} upload")
+    return sr.AudioData(pcm, sample_rate, TARGET_SAMPLE_WIDTH)
+
+def _decode_with_pyav(stream, sample_rate):
+    resampler = av.AudioResampler(format='s16', layout='mono', rate=sample_rate)
+    chunks = []
+    try:
+        with av.open(stream, mode='r') as container:
+            if not container.streams.audio:
+                raise TranscodeError('Upload contains no audio stream')
+            for frame in container.decode(audio=0):
+                for resampled in resampler.resample(frame):
+                    chunks.append(bytes(resampled.planes[0])[:resampled.samples * TARGET_SAMPLE_WIDTH])
+            for resampled in resampler.resample(None):
+                chunks.append(bytes(resampled.planes[0])[:resampled.samples * TARGET_SAMPLE_WIDTH])
+    except TranscodeError:
+        raise
+    except Exception as e:  # av.error.* (named differently across PyAV versions)
+        raise TranscodeError(f"Could not decode audio: {e}")
+    return b''.join(chunks)
+
+def _decode_with_ffmpeg(data, sample_rate):
+    binary = shutil.which(FFMPEG_BINARY)
+    if binary is None:
+        raise TranscodeError('Decoding this audio format requires ffmpeg or PyAV to be installed')
+    command = [
+        binary, '-hide_banner', '-loglevel', 'error', '-nostdin',
+        '-i', 'pipe:0',
+        '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(sample_rate),
+        'pipe:1'
+    ]
+    try:
+        completed = subprocess.run(command, input=data, capture_output=True, timeout=TRANSCODE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise TranscodeError(f"Audio decoding exceeded {TRANSCODE_TIMEOUT:g}s")
+    if completed.returncode != 0:
+        message = completed.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise TranscodeError(f"Could not decode audio: {message[-1] if message else 'ffmpeg failed'}")
+    return completed.stdout
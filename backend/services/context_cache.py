@@ -0,0 +1,164 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Optional
+
+import google.generativeai as genai
+
+from services.request_scheduler import PRIORITY_STANDARD, SchedulerBusyError
+
+try:
+    from google.generativeai import caching
+except ImportError:  # older SDKs without context caching
+    caching = None
+
+
+class ContextCache:
+    """
+    Reuses a Gemini cached-content handle for a stable prompt prefix
+    (resume + job description), keyed per session.
+
+    Calls made with the returned model only send the task-specific part of
+    the prompt; the prefix is served from the upstream cache. Prefixes below
+    min_chars are not cached (the API enforces a minimum token count).
+    Creating the cache is an upstream call like any other: it goes through
+    the rate-limit scheduler and is recorded by the usage tracker. A failed
+    creation disables caching for the model for retry_seconds, so an
+    unsupported model doesn't pay for a failed request on every session.
+    """
+
+    def __init__(self, model_name: str, enabled: bool = True, min_chars: int = 16000,
+                 ttl_seconds: int = 1800, max_entries: int = 256, retry_seconds: int = 600,
+                 scheduler=None, tracker=None):
+        self.model_name = model_name
+        self.enabled = enabled and caching is not None
+        self.scheduler = scheduler
+        self.tracker = tracker
+        self._unavailable_until = 0.0
+        self.min_chars = min_chars
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.retry_seconds = retry_seconds
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._key_locks = {}
+
+    def is_cacheable(self, prefix: str) -> bool:
+        """
+        Whether get_model may serve this prefix from the cache
+        """
+        return self.enabled and len(prefix) >= self.min_chars and time.monotonic() >= self._unavailable_until
+
+    def get_model(self, key: Optional[str], prefix: str, priority: int = PRIORITY_STANDARD):
+        """
+        Return a GenerativeModel bound to the cached prefix, or None when the
+        caller should send the full prompt instead
+        """
+        if not self.is_cacheable(prefix):
+            return None
+
+        prefix_hash = hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+        key = key or prefix_hash
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only one thread creates the upstream cache for a given key
+        with key_lock:
+            entry = self._lookup(key, prefix_hash)
+            if entry is not None:
+                return entry["model"]
+
+            if time.monotonic() < self._unavailable_until:
+                return None
+            cached_content = self._create(key, prefix, priority)
+            if cached_content is None:
+                return None
+            entry = {
+                "prefix_hash": prefix_hash,
+                "handle": cached_content,
+                "model": genai.GenerativeModel.from_cached_content(cached_content=cached_content),
+                # Refresh a little before the upstream TTL runs out
+                "expires_at": time.monotonic() + self.ttl_seconds * 0.9
+            }
+            self._store(key, entry)
+            return entry["model"]
+
+    def _create(self, key, prefix, priority):
+        started = time.perf_counter()
+
+        def create():
+            return caching.CachedContent.create(
+                model=self.model_name,
+                display_name=f"interview-{key}"[:128],
+                contents=[prefix],
+                ttl=timedelta(seconds=self.ttl_seconds)
+            )
+
+        try:
+            if self.scheduler is not None:
+                cached_content = self.scheduler.run(create, priority, len(prefix) // 4)
+            else:
+                cached_content = create()
+        except SchedulerBusyError:
+            raise
+        except Exception as e:
+            print(f"Context caching unavailable for {self.model_name}: {e}")
+            self._unavailable_until = time.monotonic() + self.retry_seconds
+            self._record(started, key, error=str(e))
+            return None
+        usage = getattr(cached_content, "usage_metadata", None)
+        self._record(started, key, prompt_tokens=getattr(usage, "total_token_count", 0) or 0)
+        return cached_content
+
+    def _record(self, started, key, **fields):
+        if self.tracker is not None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.tracker.record("context_cache_create", elapsed_ms, elapsed_ms, session_id=key, **fields)
+
+    def release(self, key: str):
+        """
+        Drop the cached context for a key (e.g. when a session completes)
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            self._key_locks.pop(key, None)
+        if entry is not None:
+            self._delete_handle(entry)
+
+    def _lookup(self, key, prefix_hash):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["prefix_hash"] != prefix_hash or entry["expires_at"] <= time.monotonic():
+                del self._entries[key]
+                stale = entry
+            else:
+                self._entries.move_to_end(key)
+                return entry
+        self._delete_handle(stale)
+        return None
+
+    def _store(self, key, entry):
+        evicted = []
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, evicted_entry = self._entries.popitem(last=False)
+                self._key_locks.pop(evicted_key, None)
+                evicted.append(evicted_entry)
+        for evicted_entry in evicted:
+            self._delete_handle(evicted_entry)
+
+    def _delete_handle(self, entry):
+        if entry.get("handle") is None:
+            return
+        try:
+            entry["handle"].delete()
+        except Exception as e:
+            print(f"Error deleting cached context: {e}")
@@ -1,26 +1,393 @@
+import multiprocessing
+import os
+import re
+import threading
+import time
+import unicodedata
+import zipfile
+from collections import Counter
+import xml.etree.ElementTree as ET
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from PyPDF2 import PdfReader
-from docx import Document
 
-def extract_text_from_file(filepath):
+# Bump whenever extraction output changes so cached text is re-extracted
+EXTRACTOR_VERSION = 4
+
+# Default page cap for PDF extraction (0 = no cap)
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '0')) or None
+
+# Process pool extraction settings
+EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', str(min(4, os.cpu_count() or 1))))
+EXTRACTION_TIMEOUT = float(os.getenv('EXTRACTION_TIMEOUT', '60'))
+PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', '8'))
+# Workers must not be forked from the threaded server process
+EXTRACTION_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ExtractionTimeoutError(TimeoutError):
+    """
+    Raised when a document takes longer than its extraction timeout
+    """
+
+
+def extract_text_from_file(filepath, max_pages=PDF_MAX_PAGES, max_chars=None,
+                           use_process_pool=False, timeout=EXTRACTION_TIMEOUT):
+    """
+    Extract text from a PDF, DOCX or TXT file.
+    max_pages caps the PDF pages read; max_chars stops reading once that
+    many characters have been extracted and truncates the result.
+    With use_process_pool, extraction runs in the shared worker pool and
+    raises ExtractionTimeoutError after `timeout` seconds.
+    """
+    if use_process_pool:
+        return extract_text_in_pool(filepath, max_pages, max_chars, timeout)
+    
     if filepath.lower().endswith('.pdf'):
-        return extract_text_from_pdf(filepath)
+        return extract_text_from_pdf(filepath, max_pages=max_pages, max_chars=max_chars)
     elif filepath.lower().endswith('.docx'):
-        return extract_text_from_docx(filepath)
+        return extract_text_from_docx(filepath, max_chars=max_chars)
     elif filepath.lower().endswith('.txt'):
-        return extract_text_from_txt(filepath)
+        text = extract_text_from_txt(filepath)
     else:
         raise ValueError('Unsupported file type')
+    return text[:max_chars] if max_chars is not None else text
+
+def iter_pdf_pages(filepath, max_pages=None):
+    """
+    Yield the text of each PDF page lazily, reading at most max_pages pages
+    """
+    with open(filepath, 'rb') as f:
+        reader = PdfReader(f)
+        page_count = len(reader.pages)
+        if max_pages is not None:
+            page_count = min(page_count, max_pages)
+        for index in range(page_count):
+            yield reader.pages[index].extract_text() or ''
+
+def extract_text_from_pdf(filepath, max_pages=None, max_chars=None):
+    """
+    Extract PDF text page by page and join it once at the end.
+    With max_chars, stops parsing pages as soon as enough text is collected.
+    """
+    if max_chars is None:
+        return ''.join(iter_pdf_pages(filepath, max_pages))
+
+    parts = []
+    collected = 0
+    pages = iter_pdf_pages(filepath, max_pages)
+    try:
+        for text in pages:
+            parts.append(text)
+            collected += len(text)
+            if collected >= max_chars:
+                break
+    finally:
+        pages.close()
+    return ''.join(parts)[:max_chars]
+
+def extract_text_in_pool(filepath, max_pages=PDF_MAX_PAGES, max_chars=None, timeout=EXTRACTION_TIMEOUT):
+    """
+    Extract text in the bounded process pool so CPU-bound parsing runs off
+    the request thread and outside the GIL. Large PDFs are split into page
+    ranges handled by different workers. If the document misses its
+    deadline, the pool's workers are terminated so a pathological file
+    cannot keep a worker busy indefinitely; documents that were in flight
+    on that pool are resubmitted to a fresh one within their own deadline.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        pool = _get_pool()
+        try:
+            return _extract_with_pool(pool, filepath, max_pages, max_chars, deadline)
+        except FutureTimeoutError:
+            _terminate_pool(pool)
+            raise ExtractionTimeoutError(f'Extraction exceeded {timeout:g}s for {os.path.basename(filepath)}')
+        except BrokenProcessPool:
+            # A worker died; unless another document's timeout killed it, the failure is ours
+            if _retire_pool(pool) or time.monotonic() >= deadline:
+                raise
+        except (CancelledError, RuntimeError):
+            # Cancelled by, or submitted during, another document's pool termination
+            if _is_current_pool(pool) or time.monotonic() >= deadline:
+                raise
+
+def _extract_with_pool(pool, filepath, max_pages, max_chars, deadline):
+    # Futures are never cancelled: a cancelled future still queued when the pool
+    # is terminated makes the pool's management thread fail with InvalidStateError
+    # instead of marking the remaining futures broken
+    page_count = 0
+    if filepath.lower().endswith('.pdf') and max_chars is None:
+        page_count = count_pdf_pages(filepath)
+        if max_pages is not None:
+            page_count = min(page_count, max_pages)
+    
+    futures = []
+    if page_count > PDF_PAGES_PER_TASK:
+        for start in range(0, page_count, PDF_PAGES_PER_TASK):
+            stop = min(start + PDF_PAGES_PER_TASK, page_count)
+            futures.append(pool.submit(extract_pdf_page_range, filepath, start, stop))
+    else:
+        futures.append(pool.submit(extract_text_from_file, filepath, max_pages, max_chars))
+    
+    parts = []
+    for future in futures:
+        parts.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+    return ''.join(parts)
+
+def extract_pdf_page_range(filepath, start, stop):
+    """
+    Extract the text of pages [start, stop) of a PDF (process pool task)
+    """
+    with open(filepath, 'rb') as f:
+        reader = PdfReader(f)
+        return ''.join(reader.pages[index].extract_text() or '' for index in range(start, stop))
+
+def count_pdf_pages(filepath):
+    with open(filepath, 'rb') as f:
+        return len(PdfReader(f).pages)
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context(EXTRACTION_START_METHOD)
+            )
+        return _pool
+
+def _is_current_pool(pool):
+    with _pool_lock:
+        return _pool is pool
+
+def _retire_pool(pool):
+    """
+    Stop handing out pool; returns False if it had already been retired
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return False
+        _pool = None
+        return True
+
+def _terminate_pool(pool):
+    """
+    Kill the workers of a pool with a stuck task and start fresh on next use.
+    Other documents in flight on that pool see it broken and are retried,
+    so their queued futures are left for the pool to fail, not cancelled.
+    """
+    _retire_pool(pool)
+    if hasattr(pool, 'terminate_workers'):  # Python 3.14+
+        pool.terminate_workers()
+        return
+    # Older Pythons have no public API for this; shutdown() alone would wait on the stuck worker.
+    # Shut down first: workers are spawned on submit, and none may start after this snapshot.
+    processes = getattr(pool, '_processes', None) or {}
+    pool.shutdown(wait=False)
+    for process in list(processes.values()):
+        process.terminate()
+
+# Characters mapped after NFKC: bullet glyphs (including the private-use
+# Symbol/Wingdings bullets Word exports), typographic dashes and quotes,
+# and invisible characters that only inflate the text
+_GLYPH_MAP = str.maketrans({
+    **dict.fromkeys('\uf0b7\uf0a7\uf076\uf0d8\uf0fc\u2022\u25e6\u25aa\u25a0\u25cf\u22c4\u27a2\u2043\u2219', '-'),
+    **dict.fromkeys('\u2010\u2011\u2012\u2013\u2212', '-'),
+    **dict.fromkeys('\u2014\u2015', ' - '),
+    **dict.fromkeys('\u2018\u2019\u201a\u2032', "'"),
+    **dict.fromkeys('\u201c\u201d\u201e\u2033', '"'),
+    **dict.fromkeys('\u00ad\u200b\u200c\u200d\u2060\ufeff', None),
+    '\t': ' ',
+    '\r': '\n',
+})
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b-\x1f\x7f]')
+_SPACE_RUNS = re.compile(r' {2,}')
+_BLANK_LINE_RUNS = re.compile(r'\n{3,}')
+_LINE_EDGES = re.compile(r' *\n *')
+# "real -time", "end -to-end", "LLM -based" -> attached hyphen
+_DETACHED_HYPHEN = re.compile(r'(?<=\w) -(?=\w)')
+_SPACE_BEFORE_PUNCT = re.compile(r' +(?=[,.;:!?](?:\s|$))')
+# Left word and its separating space; the right word is only looked at, so
+# it can in turn be the left word of the next pair
+_WORD_PAIR = re.compile(r"(?<![\w'])([A-Za-z]+) (?=([A-Za-z]+)\b)")
+_WORDS = re.compile(r'[A-Za-z]+')
+
+# Trailing fragments that PDF text extraction commonly splits off a word.
+# None of them is an English word on its own.
+_SPLIT_SUFFIXES = frozenset((
+    'tion', 'tions', 'sion', 'sions', 'ment', 'ments', 'ness', 'ities', 'ologies', 'ology',
+    'ogies', 'ogy', 'nique', 'niques', 'ical', 'ized', 'ization', 'izations', 'ible', 'ures'
+))
+# Words that are complete on their own and also start or end common
+# compounds ("not able" / "notable", "any one" / "anyone"); never joined
+_STANDALONE_WORDS = frozenset((
+    'a', 'able', 'all', 'also', 'am', 'an', 'and', 'any', 'are', 'as', 'at', 'axis', 'back',
+    'base', 'be', 'body', 'but', 'by', 'can', 'day', 'do', 'down', 'end', 'ever', 'every',
+    'for', 'from', 'front', 'go', 'had', 'has', 'have', 'he', 'her', 'his', 'how', 'i', 'if',
+    'in', 'into', 'is', 'it', 'its', 'line', 'log', 'may', 'me', 'more', 'my', 'no', 'not',
+    'of', 'on', 'one', 'only', 'or', 'our', 'out', 'over', 'self', 'set', 'she', 'side',
+    'so', 'some', 'than', 'that', 'the', 'their', 'then', 'there', 'they', 'thing', 'this',
+    'time', 'to', 'under', 'up', 'very', 'was', 'way', 'we', 'what', 'where', 'who', 'will',
+    'with', 'work', 'would', 'x', 'y', 'you', 'z'
+))
+
+
+def normalize_text(text):
+    """
+    Clean up extracted document text: Unicode (NFKC) normalization, bullet,
+    dash and quote glyph mapping, whitespace collapsing and repair of
+    detached hyphens and words split by PDF extraction ("s ecurity",
+    "tech niques"). Returns (normalized_text, stats).
+    """
+    original_chars = len(text)
+    text = unicodedata.normalize('NFKC', text).translate(_GLYPH_MAP)
+    text = _CONTROL_CHARS.sub('', text)
+    text = _SPACE_RUNS.sub(' ', text)
+    text = _LINE_EDGES.sub('\n', text)
+    text = _BLANK_LINE_RUNS.sub('\n\n', text).strip()
+    text = _DETACHED_HYPHEN.sub('-', text)
+    text = _SPACE_BEFORE_PUNCT.sub('', text)
+    text, repaired_words = _repair_split_words(text)
+    stats = {
+        'original_chars': original_chars,
+        'normalized_chars': len(text),
+        'reduction_pct': round(100 * (1 - len(text) / original_chars), 1) if original_chars else 0.0,
+        'repaired_words': repaired_words
+    }
+    return text, stats
+
+def _repair_split_words(text):
+    """
+    Join "left right" pairs that are a word split by PDF extraction
+    ("s ecurity", "tech niques"). A pair is only joined when the joined word
+    also occurs whole in the same document and the right fragment never
+    occurs on its own, so correct text ("not able", "y axis") is left as is.
+    The cue is a lone lowercase letter, a known suffix fragment or a
+    lowercase continuation.
+    """
+    words = Counter(word.lower() for word in _WORDS.findall(text))
+    pairs = Counter((left.lower(), right.lower()) for left, right in _WORD_PAIR.findall(text))
+    repaired = 0
+
+    def join(match):
+        nonlocal repaired
+        left, right = match.group(1), match.group(2)
+        left_key, right_key = left.lower(), right.lower()
+        # The continuation must match the left fragment's case ("TECHN OLOGIES", "tech niques")
+        same_case = right.islower() or (left.isupper() and right.isupper())
+        if not same_case or left_key in _STANDALONE_WORDS or right_key in _STANDALONE_WORDS:
+            return match.group(0)
+        if (left_key + right_key) not in words or words[right_key] > pairs[(left_key, right_key)]:
+            return match.group(0)
+        if ((len(left) == 1 and left.islower())
+                or right_key in _SPLIT_SUFFIXES
+                or (len(right) > 1 and right.islower())):
+            repaired += 1
+            return left
+        return match.group(0)
+
+    return _WORD_PAIR.sub(join, text), repaired
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY, _W_P, _W_R, _W_T, _W_TAB = f'{_W}body', f'{_W}p', f'{_W}r', f'{_W}t', f'{_W}tab'
+_W_TBL, _W_TR, _W_TC = f'{_W}tbl', f'{_W}tr', f'{_W}tc'
+_W_BREAKS = (f'{_W}br', f'{_W}cr')
+# Text boxes are stored twice: as DrawingML in mc:Choice and as VML in mc:Fallback
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
 
-def extract_text_from_pdf(filepath):
-    reader = PdfReader(filepath)
-    text = ''
-    for page in reader.pages:
-        text += page.extract_text() or ''
-    return text
+def iter_docx_blocks(filepath):
+    """
+    Yield the text of each paragraph and table row of a DOCX in document
+    order, streaming word/document.xml with iterparse instead of building
+    the python-docx object model. Table rows are yielded as their cell
+    texts joined with " | ". Finished top-level blocks are dropped from the
+    tree, so memory stays bounded by the largest paragraph or table.
+    """
+    with zipfile.ZipFile(filepath) as archive, archive.open('word/document.xml') as xml:
+        paragraphs = []  # run texts of each open paragraph (text boxes nest paragraphs)
+        cells = []       # paragraph texts of each open table cell
+        rows = []        # cell texts of each open table row
+        body = None
+        in_run = 0
+        skip = 0
+        for event, elem in ET.iterparse(xml, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                if tag == _MC_FALLBACK:
+                    skip += 1
+                elif skip:
+                    continue
+                elif tag == _W_P:
+                    paragraphs.append([])
+                elif tag == _W_R:
+                    in_run += 1
+                elif tag == _W_TC:
+                    cells.append([])
+                elif tag == _W_TR:
+                    rows.append([])
+                elif tag == _W_BODY:
+                    body = elem
+                continue
+            
+            if tag == _MC_FALLBACK:
+                skip -= 1
+                continue
+            if skip:
+                continue
+            if tag == _W_R:
+                in_run -= 1
+            elif in_run and paragraphs and tag == _W_T:
+                paragraphs[-1].append(elem.text or '')
+            elif in_run and paragraphs and tag == _W_TAB:
+                # w:tab outside a run is a tab stop definition, not text
+                paragraphs[-1].append('\t')
+            elif in_run and paragraphs and tag in _W_BREAKS:
+                paragraphs[-1].append('\n')
+            elif tag == _W_P:
+                text = ''.join(paragraphs.pop())
+                if cells:
+                    cells[-1].append(text)
+                else:
+                    yield text
+            elif tag == _W_TC:
+                text = '\n'.join(part for part in cells.pop() if part)
+                if rows:
+                    rows[-1].append(text)
+            elif tag == _W_TR:
+                text = ' | '.join(cell for cell in rows.pop() if cell)
+                if cells:
+                    cells[-1].append(text)
+                elif text:
+                    yield text
+            
+            if tag in (_W_P, _W_TBL) and body is not None and not paragraphs and not cells:
+                body.clear()
 
-def extract_text_from_docx(filepath):
-    doc = Document(filepath)
-    return '\n'.join([para.text for para in doc.paragraphs])
+def extract_text_from_docx(filepath, max_chars=None):
+    """
+    Extract DOCX paragraph and table text. With max_chars, stops reading
+    the document as soon as enough text is collected.
+    """
+    if max_chars is None:
+        return '\n'.join(iter_docx_blocks(filepath))
+    
+    parts = []
+    collected = 0
+    blocks = iter_docx_blocks(filepath)
+    try:
+        for text in blocks:
+            parts.append(text)
+            collected += len(text) + 1
+            if collected >= max_chars:
+                break
+    finally:
+        blocks.close()
+    return '\n'.join(parts)[:max_chars]
 
 def extract_text_from_txt(filepath):
     with open(filepath, 'r', encoding='utf-8') as f:
@@ -0,0 +1,56 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from services.document_processor import EXTRACTOR_VERSION
+
+
+class ExtractionCache:
+    """
+    Extracted document text keyed by the SHA-256 of the uploaded bytes.
+
+    Keys also carry the file extension, the extractor version and any
+    option variant, so changing the extraction code (bump EXTRACTOR_VERSION)
+    or its options never serves stale text.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, sha256: str, extension: str, variant: str = "") -> str:
+        name = f"{sha256}.{extension}.v{EXTRACTOR_VERSION}"
+        if variant:
+            name += f".{variant}"
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def get(self, sha256: str, extension: str, variant: str = "") -> Optional[Dict]:
+        """
+        Return the cached entry for a document, or None
+        """
+        try:
+            with open(self._path(sha256, extension, variant), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading extraction cache for {sha256}: {e}")
+            return None
+
+    def put(self, sha256: str, extension: str, entry: Dict, variant: str = ""):
+        """
+        Store an entry (at least {"text": ...}) for a document
+        """
+        path = self._path(sha256, extension, variant)
+        entry = dict(entry, sha256=sha256, extractor_version=EXTRACTOR_VERSION,
+                     cached_at=datetime.now().isoformat())
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Error writing extraction cache for {sha256}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
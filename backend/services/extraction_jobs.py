@@ -0,0 +1,192 @@
+import http.client
+import ipaddress
+import json
+import os
+import socket
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+CALLBACK_TIMEOUT = 10
+# Comma-separated hosts callbacks may be sent to. When set, only these hosts are
+# allowed (internal ones included); otherwise any host resolving to public addresses is.
+CALLBACK_ALLOWED_HOSTS = {host.strip().lower() for host in os.getenv('CALLBACK_ALLOWED_HOSTS', '').split(',')
+                          if host.strip()}
+
+
+class _PinnedHTTPConnection(http.client.HTTPConnection):
+    """
+    HTTP connection to an already validated address; the Host header still
+    names the original host
+    """
+
+    def __init__(self, host, address, port, timeout):
+        super().__init__(host, port, timeout=timeout)
+        self.address = address
+
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port), self.timeout)
+
+
+class _PinnedHTTPSConnection(http.client.HTTPSConnection):
+    """
+    HTTPS connection to an already validated address; SNI, certificate
+    verification and the Host header use the original host
+    """
+
+    def __init__(self, host, address, port, timeout):
+        super().__init__(host, port, timeout=timeout, context=ssl.create_default_context())
+        self.address = address
+
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+class ExtractionJobs:
+    """
+    Background extraction jobs for documents too large to extract inside
+    the upload request.
+
+    Jobs are keyed by document id, so re-uploading a document that is
+    already queued or processing joins the existing job. State is kept in
+    memory only: results themselves live in the extraction cache, and
+    finished jobs are forgotten after `retention_seconds`.
+    """
+
+    def __init__(self, max_workers: int = 2, retention_seconds: int = 3600):
+        self.retention_seconds = retention_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='extraction-job')
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def submit(self, document_id: str, func: Callable[[], Dict], filename: str = None,
+               callback_url: Optional[str] = None) -> Dict:
+        """
+        Run func() in the background for document_id unless a job for it is
+        already pending. func returns the result fields stored on the job.
+        If callback_url is given, the final job state is POSTed to it.
+        """
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(document_id)
+            if job is not None and job["status"] in ("queued", "processing"):
+                if callback_url:
+                    job["callback_urls"].append(callback_url)
+                return self._public(job)
+
+            job = {
+                "document_id": document_id,
+                "filename": filename,
+                "status": "queued",
+                "created_at": datetime.now().isoformat(),
+                "finished_at": None,
+                "finished_monotonic": None,
+                "error": None,
+                "result": None,
+                "callback_urls": [callback_url] if callback_url else []
+            }
+            self._jobs[document_id] = job
+        self.executor.submit(self._run, job, func)
+        return self._public(job)
+
+    def get(self, document_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(document_id)
+            return self._public(job) if job else None
+
+    def _run(self, job, func):
+        with self._lock:
+            job["status"] = "processing"
+        try:
+            result = func()
+            with self._lock:
+                job["result"] = result
+                job["status"] = "completed"
+        except Exception as e:
+            print(f"Error extracting document {job['document_id']}: {e}")
+            with self._lock:
+                job["error"] = str(e)
+                job["status"] = "failed"
+        with self._lock:
+            job["finished_at"] = datetime.now().isoformat()
+            job["finished_monotonic"] = time.monotonic()
+            callback_urls = list(job["callback_urls"])
+            payload = {key: job[key] for key in ("document_id", "filename", "status", "error", "finished_at")}
+        for url in callback_urls:
+            self._notify(url, payload)
+
+    def _notify(self, url, payload):
+        # Resolved and checked at send time, and the connection goes to an address
+        # that was checked, so a DNS answer that changes in between is never used
+        addresses = is_valid_callback_url(url)
+        if not addresses:
+            print(f"Refused extraction callback to {url}: not an allowed address")
+            return
+        parsed = urlparse(url)
+        connection_class = _PinnedHTTPSConnection if parsed.scheme == "https" else _PinnedHTTPConnection
+        path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+        body = json.dumps(payload).encode('utf-8')
+        for address in addresses:
+            connection = connection_class(parsed.hostname, address, parsed.port, CALLBACK_TIMEOUT)
+            try:
+                connection.request("POST", path, body=body, headers={'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                # Redirects are not followed: they could point at an internal address
+                if response.status >= 300:
+                    print(f"Extraction callback to {url} returned HTTP {response.status}")
+                return
+            except (OSError, http.client.HTTPException) as e:
+                error = e
+            finally:
+                connection.close()
+        print(f"Error sending extraction callback to {url}: {error}")
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.retention_seconds
+        expired = [document_id for document_id, job in self._jobs.items()
+                   if job["finished_monotonic"] is not None and job["finished_monotonic"] < cutoff]
+        for document_id in expired:
+            del self._jobs[document_id]
+
+    @staticmethod
+    def _public(job):
+        return {key: value for key, value in job.items() if key not in ("callback_urls", "finished_monotonic")}
+
+
+def is_valid_callback_url(url: str) -> List[str]:
+    """
+    Addresses an http(s) URL may be POSTed to, or an empty list if it must
+    not be: its host is in CALLBACK_ALLOWED_HOSTS, or (without an allowlist)
+    every address it resolves to is public, so loopback, private,
+    link-local and cloud metadata addresses are refused. Connect to the
+    returned addresses rather than resolving the host again.
+    """
+    parsed = urlparse(url or "")
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return []
+    host = parsed.hostname.lower()
+    if CALLBACK_ALLOWED_HOSTS and host not in CALLBACK_ALLOWED_HOSTS:
+        return []
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        addresses = list(dict.fromkeys(
+            info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+        ))
+    except (OSError, ValueError):
+        return []
+    if not CALLBACK_ALLOWED_HOSTS and not all(_is_public_address(address) for address in addresses):
+        return []
+    return addresses
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split('%')[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
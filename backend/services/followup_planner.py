@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+ADAPTIVE_MAX_SPECULATIVE_CALLS = int(os.getenv('ADAPTIVE_MAX_SPECULATIVE_CALLS', '2'))
+ADAPTIVE_WORKERS = int(os.getenv('ADAPTIVE_WORKERS', '4'))
+
+
+class FollowUpPlanner:
+    """
+    Generates follow-up questions for adaptive sessions in the background.
+
+    While the candidate answers question N, a follow-up for slot N+1 is
+    generated from the conversation so far and parked on the session;
+    InterviewSessionManager.get_next_question swaps it in when slot N+1 is
+    served. If the follow-up is not ready in time, the planned question is
+    served instead, so the candidate never waits on it.
+    """
+
+    def __init__(self, gemini_service, session_manager, max_workers=ADAPTIVE_WORKERS):
+        self.gemini_service = gemini_service
+        self.session_manager = session_manager
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='followup')
+
+    def schedule(self, session_id, slot):
+        """
+        Start generating a follow-up for question slot `slot` if the session's
+        speculative budget allows it. Returns True if a job was started.
+        """
+        if not self.session_manager.reserve_followup(session_id, slot):
+            return False
+        self.executor.submit(self._generate, session_id, slot)
+        return True
+
+    def _generate(self, session_id, slot):
+        question = None
+        try:
+            session_data = self.session_manager.get_session(session_id)
+            if session_data:
+                question = self.gemini_service.generate_followup_question(
+                    session_data, slot, session_id=session_id
+                )
+        except Exception as e:
+            print(f"Error generating follow-up for session {session_id}: {e}")
+        finally:
+            self.session_manager.store_followup(session_id, slot, question)
@@ -1,12 +1,30 @@
 import google.generativeai as genai
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 import json
+import time
+from services.context_cache import ContextCache
+from services.resume_parser import relevant_resume_text
+from services.request_scheduler import (
+    PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_STANDARD, SchedulerBusyError, gemini_scheduler
+)
+from services.usage_tracker import token_counts, usage_tracker
 
 load_dotenv()
 
+# Batch question generation settings
+BATCH_PACK_SIZE = int(os.getenv('GEMINI_BATCH_PACK_SIZE', '4'))
+BATCH_PROMPT_CHARS = int(os.getenv('GEMINI_BATCH_PROMPT_CHARS', '24000'))
+BATCH_CONCURRENCY = int(os.getenv('GEMINI_BATCH_CONCURRENCY', '4'))
+
+# Context caching of the shared resume/job description prefix
+CONTEXT_CACHE_ENABLED = os.getenv('GEMINI_CONTEXT_CACHE', 'true').lower() in ('1', 'true', 'yes')
+CONTEXT_CACHE_MIN_CHARS = int(os.getenv('GEMINI_CONTEXT_CACHE_MIN_CHARS', '16000'))
+CONTEXT_CACHE_TTL = int(os.getenv('GEMINI_CONTEXT_CACHE_TTL', '1800'))
+
 class GeminiService:
-    def __init__(self):
+    def __init__(self, scheduler=None, tracker=None):
         self.api_key = os.getenv('GEMINI_API_KEY')
         self.model_name = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')
         
@@ -15,70 +33,33 @@ class GeminiService:
         
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel(self.model_name)
+        self.scheduler = scheduler or gemini_scheduler
+        self.tracker = tracker or usage_tracker
+        self.context_cache = ContextCache(
+            self.model_name,
+            enabled=CONTEXT_CACHE_ENABLED,
+            min_chars=CONTEXT_CACHE_MIN_CHARS,
+            ttl_seconds=CONTEXT_CACHE_TTL,
+            scheduler=self.scheduler,
+            tracker=self.tracker
+        )
     
-    def generate_interview_questions(self, resume_text, job_description, experience_level="intermediate"):
+    def generate_interview_questions(self, resume_text, job_description, experience_level="intermediate",
+                                     priority=PRIORITY_INTERACTIVE, session_id=None, endpoint=None):
         """
         Generate interview questions based on resume, job description, and experience level
         """
-        prompt = f"""
-        You are an expert AI interviewer. Generate EXACTLY 3 relevant interview questions based on the following:
-        
-        RESUME/CANDIDATE PROFILE:
-        {resume_text}
-        
-        JOB DESCRIPTION:
-        {job_description}
-        
-        EXPERIENCE LEVEL: {experience_level}
-        
-        Guidelines:
-        - Generate EXACTLY 3 questions appropriate for {experience_level} level candidate
-        - Focus on technical skills, problem-solving, and behavioral aspects
-        - Questions should be specific to the role and candidate's background
-        - Include a mix of technical and behavioral questions
-        - Each question should be clear and concise
-        - Questions should be answerable in 1-2 minutes each
-        
-        Return the response as a JSON array of questions with the following format:
-        {{
-            "questions": [
-                {{
-                    "id": 1,
-                    "question": "Question text here",
-                    "type": "technical" or "behavioral",
-                    "difficulty": "easy", "medium", or "hard"
-                }},
-                {{
-                    "id": 2,
-                    "question": "Question text here",
-                    "type": "technical" or "behavioral",
-                    "difficulty": "easy", "medium", or "hard"
-                }},
-                {{
-                    "id": 3,
-                    "question": "Question text here",
-                    "type": "technical" or "behavioral",
-                    "difficulty": "easy", "medium", or "hard"
-                }}
-            ]
-        }}
-        """
+        context = self._context_prefix(resume_text, job_description)
+        prompt = self._questions_prompt(experience_level)
         
         try:
-            response = self.model.generate_content(prompt)
-            # Extract JSON from response
-            response_text = response.text
-            # Clean up the response to extract JSON
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
-            
-            return json.loads(response_text)
+            return self._generate_json(
+                prompt, priority, endpoint or 'generate_questions', session_id,
+                has_fallback=True, context=context
+            )
+        except SchedulerBusyError:
+            # Overload is the caller's to report; canned questions would hide it
+            raise
         except Exception as e:
             print(f"Error generating questions: {e}")
             # Fallback questions
@@ -105,7 +86,8 @@ class GeminiService:
                 ]
             }
     
-    def analyze_interview_performance(self, interview_data):
+    def analyze_interview_performance(self, interview_data, priority=PRIORITY_STANDARD,
+                                      session_id=None, endpoint=None):
         """
         Analyze complete interview session and provide scoring
         """
@@ -113,15 +95,12 @@ class GeminiService:
         for qa in interview_data.get('conversation', []):
             questions_and_answers += f"Q: {qa['question']}\nA: {qa['answer']}\n\n"
         
-        prompt = f"""
-        You are an expert interview analyst. Analyze the following interview conversation and provide a comprehensive assessment:
-        
+        job_description = interview_data.get('job_description') or 'Not provided'
+        context = self._context_prefix(interview_data.get('resume_text') or 'Not provided', job_description)
+        task = f"""
         INTERVIEW CONVERSATION:
         {questions_and_answers}
         
-        JOB DETAILS:
-        {interview_data.get('job_description', 'Not provided')}
-        
         CANDIDATE EXPERIENCE LEVEL: {interview_data.get('experience_level', 'Not specified')}
         
         Provide a detailed analysis with the following structure:
@@ -143,22 +122,27 @@ class GeminiService:
         
         Be objective, constructive, and provide specific examples from the conversation.
         """
+        # The resume is only worth sending when the cached context serves it; otherwise the
+        # analysis gets just the job details, as it always did
+        prompt = """
+        You are an expert interview analyst. Using the candidate profile and job description above,
+        analyze the following interview conversation and provide a comprehensive assessment:
+        """ + task
+        uncached_prompt = f"""
+        You are an expert interview analyst. Analyze the following interview conversation and provide a comprehensive assessment:
+        
+        JOB DETAILS:
+        {job_description}
+        """ + task
         
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text
-            
-            # Extract JSON from response
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                response_text = response_text[json_start:json_end].strip()
-            
-            return json.loads(response_text)
+            return self._generate_json(
+                prompt, priority, endpoint or 'analyze_interview',
+                session_id or interview_data.get('session_id'), has_fallback=True, context=context,
+                uncached_prompt=uncached_prompt
+            )
+        except SchedulerBusyError:
+            raise
         except Exception as e:
             print(f"Error analyzing interview: {e}")
             # Fallback analysis
@@ -175,5 +159,328 @@ class GeminiService:
                 "areas_for_improvement": ["Technical depth", "Specific examples"],
                 "detailed_feedback": "The candidate showed good communication skills and relevant experience. However, more technical depth and specific examples would strengthen their responses.",
                 "recommendation": "maybe",
-                "confidence_level": 70
+                "confidence_level": 70,
+                # Placeholder scores, not an assessment; kept out of score analytics
+                "fallback": True
             }
+    
+    def generate_followup_question(self, session_data, slot, priority=PRIORITY_STANDARD,
+                                   session_id=None, endpoint=None):
+        """
+        Generate a follow-up question to ask at position `slot`, based on the
+        conversation so far. Raises on failure so the caller can keep the
+        planned question instead.
+        """
+        questions = session_data.get('questions', [])
+        planned = questions[slot] if slot < len(questions) else {}
+        
+        conversation = ""
+        for qa in session_data.get('conversation', []):
+            conversation += f"Q: {qa['question']}\nA: {qa['answer']}\n\n"
+        current_index = session_data.get('current_question_index', 0)
+        if current_index < len(questions):
+            conversation += f"Q: {questions[current_index].get('question', '')}\nA: (candidate is answering now)\n\n"
+        
+        context = self._context_prefix(
+            session_data.get('resume_text') or 'Not provided',
+            session_data.get('job_description') or 'Not provided'
+        )
+        prompt = f"""
+        You are an expert AI interviewer conducting an adaptive interview for the candidate and role above.
+        
+        INTERVIEW SO FAR:
+        {conversation or 'No answers yet.'}
+        
+        PLANNED NEXT QUESTION:
+        {planned.get('question', 'None')}
+        
+        Write the single best follow-up question to ask next. Probe deeper into the candidate's earlier answers
+        where they were vague or especially relevant; otherwise adapt the planned question to what you have learned.
+        The question must be clear, concise and answerable in 1-2 minutes.
+        
+        Return the response as JSON with the following format:
+        {{
+            "question": "Question text here",
+            "type": "technical" or "behavioral",
+            "difficulty": "easy", "medium", or "hard"
+        }}
+        """
+        
+        followup = self._generate_json(
+            prompt, priority, endpoint or 'generate_followup', session_id, context=context
+        )
+        if not isinstance(followup, dict) or not followup.get('question'):
+            raise ValueError('Model returned no follow-up question')
+        return {
+            "id": planned.get('id', slot + 1),
+            "question": followup['question'],
+            "type": followup.get('type', planned.get('type', 'behavioral')),
+            "difficulty": followup.get('difficulty', planned.get('difficulty', 'medium')),
+            "adaptive": True
+        }
+    
+    def generate_interview_questions_batch(self, candidates, pack_size=None, max_workers=None,
+                                           priority=PRIORITY_BULK, endpoint=None):
+        """
+        Generate interview questions for many candidates, yielding one result per
+        candidate as soon as it is available.
+        
+        Candidates applying to the same job description are packed into a single
+        prompt (up to pack_size per prompt and BATCH_PROMPT_CHARS characters);
+        packs run concurrently on at most max_workers threads. Candidates missing
+        from a packed response are retried on their own. Each result is a dict
+        with the candidate "index", "status" ("ok" or "error") and either
+        "questions" or "error".
+        """
+        pack_size = pack_size or BATCH_PACK_SIZE
+        max_workers = max_workers or BATCH_CONCURRENCY
+        endpoint = endpoint or 'generate_questions_batch'
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending = {}
+        try:
+            for pack in self._pack_candidates(candidates, pack_size):
+                pending[executor.submit(self._generate_questions_pack, pack, priority, endpoint)] = pack
+            
+            while pending:
+                future = next(as_completed(pending))
+                pack = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    if len(pack) == 1:
+                        index, _ = pack[0]
+                        yield {"index": index, "status": "error", "error": str(e)}
+                        continue
+                    results = {}
+                
+                for index, candidate in pack:
+                    if index in results:
+                        yield {"index": index, "status": "ok", "questions": results[index]}
+                    elif len(pack) > 1:
+                        # Model dropped or garbled this candidate; retry it alone
+                        single = [(index, candidate)]
+                        pending[executor.submit(self._generate_questions_pack, single, priority, endpoint)] = single
+                    else:
+                        yield {"index": index, "status": "error", "error": "No questions returned"}
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _pack_candidates(self, candidates, pack_size):
+        """
+        Group (index, candidate) pairs sharing a job description into packs
+        that fit within the batch prompt budget
+        """
+        by_job = {}
+        for index, candidate in candidates:
+            by_job.setdefault(candidate['job_description'], []).append((index, candidate))
+        
+        for job_description, group in by_job.items():
+            pack = []
+            pack_chars = len(job_description)
+            for index, candidate in group:
+                candidate_chars = len(candidate['resume_text'])
+                if pack and (len(pack) >= pack_size or pack_chars + candidate_chars > BATCH_PROMPT_CHARS):
+                    yield pack
+                    pack = []
+                    pack_chars = len(job_description)
+                pack.append((index, candidate))
+                pack_chars += candidate_chars
+            if pack:
+                yield pack
+    
+    def release_context(self, session_id):
+        """
+        Drop the cached resume/job description context for a session
+        """
+        self.context_cache.release(session_id)
+    
+    def _context_prefix(self, resume_text, job_description):
+        """
+        Build the stable resume/job description block that leads every
+        per-candidate prompt, so it can be served from the context cache.
+        Only the relevant sections of the resume are sent.
+        """
+        return f"""
+        RESUME/CANDIDATE PROFILE:
+        {relevant_resume_text(resume_text)}
+        
+        JOB DESCRIPTION:
+        {job_description}
+        """
+    
+    def _questions_prompt(self, experience_level):
+        """
+        Build the question generation instructions for a single candidate;
+        the candidate context is supplied separately by _context_prefix
+        """
+        return f"""
+        You are an expert AI interviewer. Generate EXACTLY 3 relevant interview questions based on the resume and job description above.
+        
+        EXPERIENCE LEVEL: {experience_level}
+        
+        Guidelines:
+        - Generate EXACTLY 3 questions appropriate for {experience_level} level candidate
+        - Focus on technical skills, problem-solving, and behavioral aspects
+        - Questions should be specific to the role and candidate's background
+        - Include a mix of technical and behavioral questions
+        - Each question should be clear and concise
+        - Questions should be answerable in 1-2 minutes each
+        
+        Return the response as a JSON array of questions with the following format:
+        {{
+            "questions": [
+                {{
+                    "id": 1,
+                    "question": "Question text here",
+                    "type": "technical" or "behavioral",
+                    "difficulty": "easy", "medium", or "hard"
+                }},
+                {{
+                    "id": 2,
+                    "question": "Question text here",
+                    "type": "technical" or "behavioral",
+                    "difficulty": "easy", "medium", or "hard"
+                }},
+                {{
+                    "id": 3,
+                    "question": "Question text here",
+                    "type": "technical" or "behavioral",
+                    "difficulty": "easy", "medium", or "hard"
+                }}
+            ]
+        }}
+        """
+    
+    def _generate_questions_pack(self, pack, priority=PRIORITY_BULK, endpoint='generate_questions_batch'):
+        """
+        Generate questions for a pack of candidates with one model call.
+        Returns a dict mapping candidate index to its list of questions.
+        """
+        if len(pack) == 1:
+            index, candidate = pack[0]
+            prompt = (
+                self._context_prefix(candidate['resume_text'], candidate['job_description'])
+                + self._questions_prompt(candidate.get('experience_level', 'intermediate'))
+            )
+            questions = self._generate_json(prompt, priority, endpoint).get('questions')
+            return {index: questions} if questions else {}
+        
+        candidate_blocks = ""
+        for position, (_, candidate) in enumerate(pack, start=1):
+            candidate_blocks += (
+                f"CANDIDATE {position}:\n"
+                f"EXPERIENCE LEVEL: {candidate.get('experience_level', 'intermediate')}\n"
+                f"RESUME/CANDIDATE PROFILE:\n{relevant_resume_text(candidate['resume_text'])}\n\n"
+            )
+        
+        prompt = f"""
+        You are an expert AI interviewer. Generate EXACTLY 3 relevant interview questions for EACH of the {len(pack)} candidates below.
+        All candidates applied for the same role.
+        
+        JOB DESCRIPTION:
+        {pack[0][1]['job_description']}
+        
+        {candidate_blocks}
+        Guidelines:
+        - Generate EXACTLY 3 questions per candidate, appropriate for that candidate's experience level
+        - Questions should be specific to the role and to that candidate's background
+        - Include a mix of technical and behavioral questions
+        - Each question should be clear and concise and answerable in 1-2 minutes
+        
+        Return the response as JSON with one entry per candidate, in this format:
+        {{
+            "candidates": [
+                {{
+                    "candidate": 1,
+                    "questions": [
+                        {{
+                            "id": 1,
+                            "question": "Question text here",
+                            "type": "technical" or "behavioral",
+                            "difficulty": "easy", "medium", or "hard"
+                        }}
+                    ]
+                }}
+            ]
+        }}
+        """
+        
+        response = self._generate_json(prompt, priority, endpoint)
+        results = {}
+        for entry in response.get('candidates', []):
+            try:
+                position = int(entry.get('candidate'))
+            except (TypeError, ValueError):
+                continue
+            if 1 <= position <= len(pack) and entry.get('questions'):
+                results[pack[position - 1][0]] = entry['questions']
+        return results
+    
+    def _generate_json(self, prompt, priority=PRIORITY_STANDARD, endpoint='gemini',
+                       session_id=None, has_fallback=False, context=None, uncached_prompt=None):
+        """
+        Send a prompt to the model through the rate-limit scheduler and parse
+        the JSON payload from its reply. Latency and token usage are recorded
+        against the endpoint (and session, if given) whether or not the call succeeds.
+        
+        If context is given it is sent ahead of the prompt; when the context
+        cache holds it for this session only the prompt itself is sent. When
+        the context is not cached and uncached_prompt is given, that is sent
+        on its own instead.
+        """
+        started = time.perf_counter()
+        timing = {'upstream_ms': 0.0}
+        tokens = {}
+        
+        model = None
+        if context:
+            model = self.context_cache.get_model(session_id, context, priority)
+        if model is None:
+            model = self.model
+            if uncached_prompt is not None:
+                prompt = uncached_prompt
+            elif context:
+                prompt = context + prompt
+        # Rough estimate (~4 characters per token); reconciled with actual usage below
+        estimated_tokens = len(prompt) // 4
+        
+        def call_model():
+            call_started = time.perf_counter()
+            try:
+                return model.generate_content(prompt)
+            finally:
+                timing['upstream_ms'] += (time.perf_counter() - call_started) * 1000
+        
+        try:
+            response = self.scheduler.run(call_model, priority, estimated_tokens)
+            tokens = token_counts(response)
+            actual_tokens = tokens['prompt_tokens'] + tokens['response_tokens']
+            if actual_tokens:
+                self.scheduler.reconcile_tokens(estimated_tokens, actual_tokens)
+            
+            response_text = response.text
+            
+            # Extract JSON from response
+            if "```json" in response_text:
+                json_start = response_text.find("```json") + 7
+                json_end = response_text.find("```", json_start)
+                response_text = response_text[json_start:json_end].strip()
+            elif "```" in response_text:
+                json_start = response_text.find("```") + 3
+                json_end = response_text.find("```", json_start)
+                response_text = response_text[json_start:json_end].strip()
+            
+            result = json.loads(response_text)
+        except Exception as e:
+            self.tracker.record(
+                endpoint, (time.perf_counter() - started) * 1000, timing['upstream_ms'],
+                fallback=has_fallback, error=str(e), session_id=session_id, **tokens
+            )
+            raise
+        
+        self.tracker.record(
+            endpoint, (time.perf_counter() - started) * 1000, timing['upstream_ms'],
+            session_id=session_id, **tokens
+        )
+        return result
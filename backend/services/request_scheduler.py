@@ -0,0 +1,223 @@
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+from services.usage_tracker import percentile
+
+# Priority lanes, lower value is served first
+PRIORITY_INTERACTIVE = 0  # a candidate is waiting on the result
+PRIORITY_STANDARD = 1     # user-facing but deferrable, e.g. post-interview analysis
+PRIORITY_BULK = 2         # batch pipelines
+
+LANE_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_STANDARD: "standard",
+    PRIORITY_BULK: "bulk",
+}
+
+
+class SchedulerBusyError(Exception):
+    """
+    Raised when a request cannot be admitted (lane full or queue timeout);
+    the request should be retried after retry_after seconds
+    """
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Seconds until `amount` tokens are available (0 if available now)
+        """
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        # May go negative when reconciling actual usage above the estimate
+        self.tokens -= amount
+
+
+class RateLimitScheduler:
+    """
+    Admits upstream calls within requests-per-minute and tokens-per-minute
+    budgets. Waiting calls are served strictly by priority lane, then FIFO.
+    Calls rejected upstream with HTTP 429 pause all admissions and are retried
+    with exponential backoff.
+    """
+
+    def __init__(self, requests_per_minute: int = 15, tokens_per_minute: int = 1000000,
+                 max_queue_depth: int = 200, queue_timeout: float = 60.0,
+                 bulk_queue_timeout: float = 600.0, max_retries: int = 3,
+                 backoff_seconds: float = 2.0):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self.bulk_queue_timeout = bulk_queue_timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._lanes = {
+            priority: {"queued": 0, "admitted": 0, "rejected": 0, "waits": deque(maxlen=1000)}
+            for priority in LANE_NAMES
+        }
+        self._rate_limited = 0
+        self._retries = 0
+
+    def acquire(self, priority: int = PRIORITY_STANDARD, estimated_tokens: int = 0,
+                timeout: Optional[float] = None):
+        """
+        Block until the call may be sent upstream
+        """
+        lane = self._lanes[priority]
+        if timeout is None:
+            timeout = self.bulk_queue_timeout if priority == PRIORITY_BULK else self.queue_timeout
+        enqueued = time.monotonic()
+        deadline = enqueued + timeout
+
+        with self._cond:
+            if lane["queued"] >= self.max_queue_depth:
+                lane["rejected"] += 1
+                raise SchedulerBusyError(f"{LANE_NAMES[priority]} queue is full", self._retry_after())
+
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._queue, ticket)
+            lane["queued"] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._queue[0] == ticket:
+                        wait = max(
+                            self._paused_until - now,
+                            self.request_bucket.wait_time(1, now),
+                            self.token_bucket.wait_time(estimated_tokens, now),
+                        )
+                        if wait <= 0:
+                            heapq.heappop(self._queue)
+                            self.request_bucket.consume(1)
+                            self.token_bucket.consume(min(estimated_tokens, self.token_bucket.capacity))
+                            lane["admitted"] += 1
+                            lane["waits"].append(now - enqueued)
+                            # Let the next ticket re-check the budgets
+                            self._cond.notify_all()
+                            return
+                    else:
+                        wait = deadline - now
+
+                    if now >= deadline:
+                        self._queue.remove(ticket)
+                        heapq.heapify(self._queue)
+                        lane["rejected"] += 1
+                        self._cond.notify_all()
+                        raise SchedulerBusyError(
+                            f"Timed out after {timeout:.0f}s waiting for upstream quota", self._retry_after()
+                        )
+                    self._cond.wait(min(wait, deadline - now))
+            finally:
+                lane["queued"] -= 1
+
+    def _retry_after(self) -> int:
+        # Roughly how long the calls already queued take to drain at the request rate
+        drain = (len(self._queue) + 1) / self.request_bucket.rate
+        return max(1, math.ceil(max(drain, self._paused_until - time.monotonic())))
+
+    def reconcile_tokens(self, estimated_tokens: int, actual_tokens: int):
+        """
+        Charge the difference between the estimated and actual token count
+        """
+        with self._cond:
+            self.token_bucket.consume(actual_tokens - estimated_tokens)
+
+    def run(self, call: Callable, priority: int = PRIORITY_STANDARD, estimated_tokens: int = 0):
+        """
+        Run `call` once admitted, retrying with backoff when upstream returns 429
+        """
+        attempt = 0
+        while True:
+            self.acquire(priority, estimated_tokens)
+            try:
+                return call()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt)
+                attempt += 1
+                with self._cond:
+                    self._rate_limited += 1
+                    self._retries += 1
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                print(f"Gemini rate limit hit, retrying in {delay:.1f}s (attempt {attempt})")
+
+    def metrics(self) -> Dict:
+        """
+        Queue depth and admission wait times per lane
+        """
+        with self._cond:
+            now = time.monotonic()
+            lanes = {}
+            for priority, lane in self._lanes.items():
+                waits = sorted(lane["waits"])
+                lanes[LANE_NAMES[priority]] = {
+                    "queue_depth": lane["queued"],
+                    "admitted": lane["admitted"],
+                    "rejected": lane["rejected"],
+                    "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                    "wait_ms_p95": round(percentile(waits, 95) * 1000, 1),
+                    "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+                }
+            self.request_bucket.wait_time(0, now)
+            self.token_bucket.wait_time(0, now)
+            return {
+                "lanes": lanes,
+                "requests_available": int(self.request_bucket.tokens),
+                "tokens_available": int(self.token_bucket.tokens),
+                "rate_limited": self._rate_limited,
+                "retries": self._retries,
+                "paused_for_ms": max(0, int((self._paused_until - now) * 1000)),
+            }
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    True if the upstream error is an HTTP 429 / RESOURCE_EXHAUSTED
+    """
+    code = getattr(error, "code", None)
+    if code == 429 or getattr(code, "value", None) == 429:
+        return True
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+
+# Shared by every GeminiService instance so all routes draw on one quota
+gemini_scheduler = RateLimitScheduler(
+    requests_per_minute=int(os.getenv('GEMINI_RPM', '15')),
+    tokens_per_minute=int(os.getenv('GEMINI_TPM', '1000000')),
+    max_queue_depth=int(os.getenv('GEMINI_MAX_QUEUE_DEPTH', '200')),
+    queue_timeout=float(os.getenv('GEMINI_QUEUE_TIMEOUT', '60')),
+    bulk_queue_timeout=float(os.getenv('GEMINI_BULK_QUEUE_TIMEOUT', '600')),
+    max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '3')),
+    backoff_seconds=float(os.getenv('GEMINI_BACKOFF_SECONDS', '2')),
+)
@@ -0,0 +1,166 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Bump whenever parse output changes so cached parses are recomputed
+PARSER_VERSION = 2
+
+# Canonical section name -> headings that introduce it (lowercase, no punctuation)
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "internships", "internship experience"),
+    "education": ("education", "academic background", "qualifications", "academic qualifications",
+                  "education and training"),
+    "skills": ("skills", "technical skills", "key skills", "core skills", "skills and tools",
+               "area of expertise", "areas of expertise", "expertise", "core competencies",
+               "technologies", "tech stack"),
+    "projects": ("projects", "academic projects", "personal projects", "key projects",
+                 "selected projects"),
+    "certifications": ("certifications", "certificates", "licenses and certifications", "courses"),
+    "achievements": ("achievements", "awards", "honors", "honors and awards", "accomplishments"),
+}
+_HEADING_LOOKUP = {alias: name for name, aliases in SECTION_HEADINGS.items() for alias in aliases}
+# Sections sent to the model; the header (name, contact details, links) is left out
+PROMPT_SECTIONS = ("summary", "experience", "skills", "projects", "education", "certifications", "achievements")
+
+# Skill aliases -> canonical spelling; also the vocabulary matched outside the skills section,
+# except for AMBIGUOUS_SKILL_ALIASES
+SKILL_ALIASES = {
+    "python": "Python", "java": "Java", "javascript": "JavaScript", "js": "JavaScript",
+    "typescript": "TypeScript", "ts": "TypeScript", "c++": "C++", "c#": "C#", "go": "Go",
+    "golang": "Go", "rust": "Rust", "sql": "SQL", "nosql": "NoSQL", "html": "HTML", "css": "CSS",
+    "react": "React", "reactjs": "React", "react.js": "React", "node": "Node.js", "nodejs": "Node.js",
+    "node.js": "Node.js", "flask": "Flask", "django": "Django", "fastapi": "FastAPI",
+    "aws": "AWS", "azure": "Azure", "gcp": "GCP", "google cloud": "GCP", "docker": "Docker",
+    "kubernetes": "Kubernetes", "k8s": "Kubernetes", "terraform": "Terraform", "jenkins": "Jenkins",
+    "ci/cd": "CI/CD", "git": "Git", "github": "GitHub", "linux": "Linux", "mongodb": "MongoDB",
+    "postgresql": "PostgreSQL", "postgres": "PostgreSQL", "mysql": "MySQL", "redis": "Redis",
+    "pandas": "Pandas", "numpy": "NumPy", "scikit-learn": "scikit-learn", "sklearn": "scikit-learn",
+    "tensorflow": "TensorFlow", "pytorch": "PyTorch", "keras": "Keras", "opencv": "OpenCV",
+    "mlflow": "MLflow", "sagemaker": "SageMaker", "langchain": "LangChain", "llm": "LLM",
+    "llms": "LLM", "nlp": "NLP", "rag": "RAG", "yolo": "YOLO", "machine learning": "Machine Learning",
+    "ml": "Machine Learning", "deep learning": "Deep Learning", "computer vision": "Computer Vision",
+    "data analysis": "Data Analysis", "data science": "Data Science", "rest apis": "REST APIs",
+    "rest api": "REST APIs", "tableau": "Tableau", "power bi": "Power BI", "excel": "Excel",
+    "microsoft excel": "Excel", "ms excel": "Excel",
+}
+# Aliases that are also everyday words ("go the extra mile", "excel at"). Outside a skills
+# section they only count in the acronym spellings listed here, matched case-sensitively.
+AMBIGUOUS_SKILL_ALIASES = {
+    "go": (), "excel": (), "node": (), "ts": ("TS",), "js": ("JS",), "rag": ("RAG",), "ml": ("ML",),
+}
+
+
+def _alias_pattern(aliases, flags=0):
+    return re.compile(
+        r"(?<![\w+#.])(" + "|".join(re.escape(alias) for alias in sorted(aliases, key=len, reverse=True))
+        + r")(?![\w+#])",
+        flags
+    )
+
+
+_SKILL_PATTERN = _alias_pattern([alias for alias in SKILL_ALIASES if alias not in AMBIGUOUS_SKILL_ALIASES],
+                                re.IGNORECASE)
+_ACRONYM_SKILL_PATTERN = _alias_pattern(
+    [spelling for spellings in AMBIGUOUS_SKILL_ALIASES.values() for spelling in spellings]
+)
+_SKILL_SEPARATORS = re.compile(r"[,;|\n]|\s-\s|^-\s|\s/\s", re.MULTILINE)
+_PARENTHETICAL = re.compile(r"\s*\([^)]*\)?")
+_HEADING_CLEAN = re.compile(r"[^a-z& ]+")
+MAX_HEADING_WORDS = 5
+MAX_SKILL_LENGTH = 40
+
+
+def parse_resume(text: str) -> Dict:
+    """
+    Split resume text into sections and extract a normalized skill list.
+
+    Returns {"version", "sections": [{"name", "heading", "start", "end"}],
+    "skills": [...]}. Offsets index into `text`: start..end is the section
+    body after its heading line. Text before the first heading is the
+    "header" section (name and contact details).
+    """
+    sections = []
+    current = {"name": "header", "heading": None, "start": 0}
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        name = _section_for_heading(line)
+        if name is not None:
+            current["end"] = offset
+            sections.append(current)
+            current = {"name": name, "heading": line.strip(), "start": offset + len(line)}
+        offset += len(line)
+    current["end"] = len(text)
+    sections.append(current)
+    sections = [section for section in sections if section["end"] > section["start"] or section["heading"]]
+
+    return {
+        "version": PARSER_VERSION,
+        "sections": sections,
+        "skills": extract_skills(text, sections)
+    }
+
+def extract_skills(text: str, sections: List[Dict]) -> List[str]:
+    """
+    Skills listed in skills sections, plus known skills mentioned anywhere,
+    canonicalized and de-duplicated in order of first appearance
+    """
+    skills = {}
+    for section in sections:
+        if section["name"] == "skills":
+            for item in _split_skill_list(text[section["start"]:section["end"]]):
+                skills.setdefault(item.lower(), item)
+    matches = sorted(
+        list(_SKILL_PATTERN.finditer(text)) + list(_ACRONYM_SKILL_PATTERN.finditer(text)),
+        key=lambda match: match.start()
+    )
+    for match in matches:
+        skill = SKILL_ALIASES[match.group(1).lower()]
+        skills.setdefault(skill.lower(), skill)
+    return list(skills.values())
+
+def select_sections(text: str, parsed: Dict, names: Iterable[str]) -> str:
+    """
+    Concatenate the bodies of the named sections (with their headings), in
+    document order, so prompts can carry only the relevant parts of a resume
+    """
+    wanted = set(names)
+    parts = []
+    for section in parsed["sections"]:
+        if section["name"] in wanted:
+            body = text[section["start"]:section["end"]].strip()
+            parts.append(f"{section['heading']}\n{body}" if section["heading"] else body)
+    return "\n\n".join(part for part in parts if part)
+
+def relevant_resume_text(text: str, names: Iterable[str] = PROMPT_SECTIONS) -> str:
+    """
+    The parts of a resume worth sending to the model: the PROMPT_SECTIONS,
+    or the whole text when no section headings are recognized
+    """
+    selected = select_sections(text, parse_resume(text), names)
+    return selected or text
+
+def _section_for_heading(line: str) -> Optional[str]:
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped.split()) > MAX_HEADING_WORDS:
+        return None
+    # Headings are set apart by case or a trailing colon; "Experience with Python" is not one
+    if not (stripped.isupper() or stripped.istitle() or line.strip().endswith(":")):
+        return None
+    key = " ".join(_HEADING_CLEAN.sub(" ", stripped.lower()).replace("&", "and").split())
+    return _HEADING_LOOKUP.get(key)
+
+def _split_skill_list(body: str) -> List[str]:
+    items = []
+    for line in body.splitlines():
+        # "Cloud Platforms: AWS, Azure" -> drop the category label
+        if ":" in line and not line.lower().startswith("http"):
+            line = line.split(":", 1)[1]
+        for item in _SKILL_SEPARATORS.split(line):
+            # "Large Language Models (LLMs)", or a group cut off by a separator: "AWS (EC2"
+            item = _PARENTHETICAL.sub("", item).strip(" \t-.)")
+            if not item or len(item) > MAX_SKILL_LENGTH or len(item.split()) > 4:
+                continue
+            items.append(SKILL_ALIASES.get(item.lower(), item))
+    return items
@@ -0,0 +1,293 @@
+import json
+import os
+import threading
+import warnings
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+CATEGORIES = ("technical_skills", "communication", "problem_solving", "cultural_fit", "experience_relevance")
+COLUMNS = ("overall_score",) + CATEGORIES + ("confidence_level",)
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BINS = 10  # 0-10, 10-20, ..., 90-100
+# The snapshot is rewritten once the journal has this many entries and at least as many as there are rows
+COMPACT_MIN_ENTRIES = int(os.getenv('SCORE_ANALYTICS_COMPACT_MIN', '1000'))
+
+
+def _job_key(job_title: Optional[str]) -> str:
+    return (job_title or "").strip().casefold()
+
+
+class ScoreAnalytics:
+    """
+    Columnar store of analysis scores for completed sessions.
+
+    Scores live in one float matrix (row per session, column per score)
+    with a parallel job-title code vector, so distributions and per-job
+    means are computed with vectorized NumPy operations instead of loading
+    session JSON files. Summaries are cached until the next completion.
+
+    On disk, an .npz snapshot is followed by a journal of changes made since
+    (one JSON line each), so a completion appends one line instead of
+    rewriting every row. The journal is folded into a new snapshot once it
+    outgrows the snapshot, keeping the amortized cost per change constant.
+    """
+
+    def __init__(self, store_path: str):
+        self.store_path = store_path
+        self.journal_path = f"{store_path}.journal"
+        self._journal_entries = 0
+        self._lock = threading.Lock()
+        self._scores = np.empty((0, len(COLUMNS)))
+        self._job_codes = np.empty(0, dtype=np.int32)
+        self._session_ids = []
+        self._job_titles = []  # display title per job code
+        self._job_index = {}   # job key -> job code
+        self._rows = {}        # session id -> row
+        self._size = 0
+        self._cache = {}
+        self._load()
+
+    def is_empty(self) -> bool:
+        return self._size == 0
+
+    def record(self, session_id: str, job_title: str, analysis: Dict, save: bool = True):
+        """
+        Insert or replace the scores of a completed session
+        """
+        values = self._score_vector(analysis)
+        with self._lock:
+            self._apply_record(session_id, job_title, values)
+            if save:
+                self._append({"op": "record", "session_id": session_id, "job_title": job_title,
+                              "scores": values.tolist()})
+
+    def remove(self, session_id: str):
+        """
+        Drop a session's scores (rows are tombstoned with job code -1)
+        """
+        with self._lock:
+            if self._apply_remove(session_id):
+                self._append({"op": "remove", "session_id": session_id})
+
+    def rebuild(self, sessions: Iterable[Dict]) -> int:
+        """
+        Load scores from every completed session in `sessions`, except those
+        whose analysis is the fallback returned when the model call failed
+        """
+        count = 0
+        for session_data in sessions:
+            analysis = session_data.get("analysis")
+            if session_data.get("status") == "completed" and analysis and not analysis.get("fallback"):
+                self.record(session_data["session_id"], session_data.get("job_title"),
+                            analysis, save=False)
+                count += 1
+        with self._lock:
+            self._save()
+        return count
+
+    def summary(self, job_title: Optional[str] = None) -> Dict:
+        """
+        Percentiles, histograms and means of every score column, either for
+        one job title or across all completed sessions with a per-job breakdown
+        """
+        cache_key = _job_key(job_title) if job_title is not None else None
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            scores = self._scores[:self._size]
+            codes = self._job_codes[:self._size]
+            if job_title is not None:
+                code = self._job_index.get(cache_key, -2)
+                result = {"job_title": self._job_titles[code] if code >= 0 else job_title}
+                result.update(self._distribution(scores[codes == code]))
+            else:
+                result = self._distribution(scores[codes >= 0])
+                result["job_titles"] = self._per_job_means(scores, codes)
+
+            self._cache[cache_key] = result
+            return result
+
+    def _distribution(self, scores: np.ndarray) -> Dict:
+        count = int(scores.shape[0])
+        result = {"count": count, "columns": {}}
+        if count == 0:
+            return result
+
+        valid = ~np.isnan(scores)
+        valid_counts = valid.sum(axis=0)
+        filled = np.where(valid, scores, 0.0)
+        means = filled.sum(axis=0) / np.maximum(valid_counts, 1)
+        with warnings.catch_warnings():
+            # Columns with no scores at all are skipped below
+            warnings.simplefilter("ignore", RuntimeWarning)
+            percentiles = np.nanpercentile(scores, PERCENTILES, axis=0)
+
+        # Histogram of every column in one bincount: offset each column's bin index
+        bins = np.clip((filled // (100 / HISTOGRAM_BINS)).astype(np.int64), 0, HISTOGRAM_BINS - 1)
+        bins += np.arange(len(COLUMNS)) * HISTOGRAM_BINS
+        histograms = np.bincount(bins[valid], minlength=len(COLUMNS) * HISTOGRAM_BINS)
+        histograms = histograms.reshape(len(COLUMNS), HISTOGRAM_BINS)
+
+        for index, column in enumerate(COLUMNS):
+            if valid_counts[index] == 0:
+                continue
+            result["columns"][column] = {
+                "count": int(valid_counts[index]),
+                "mean": round(float(means[index]), 2),
+                "min": float(np.nanmin(scores[:, index])),
+                "max": float(np.nanmax(scores[:, index])),
+                "percentiles": {
+                    f"p{pct}": round(float(percentiles[i][index]), 2) for i, pct in enumerate(PERCENTILES)
+                },
+                "histogram": {
+                    "bin_edges": [int(edge) for edge in np.linspace(0, 100, HISTOGRAM_BINS + 1)],
+                    "counts": histograms[index].tolist()
+                }
+            }
+        return result
+
+    def _per_job_means(self, scores: np.ndarray, codes: np.ndarray) -> Dict:
+        live = codes >= 0
+        if not live.any():
+            return {}
+        codes = codes[live]
+        scores = scores[live]
+        job_count = len(self._job_titles)
+
+        valid = ~np.isnan(scores)
+        filled = np.where(valid, scores, 0.0)
+        # Per-job sums and counts for every column via one bincount each on a flattened (job, column) index
+        flat_index = (codes[:, None] * len(COLUMNS) + np.arange(len(COLUMNS))).ravel()
+        sums = np.bincount(flat_index, weights=filled.ravel(), minlength=job_count * len(COLUMNS))
+        counts = np.bincount(flat_index, weights=valid.ravel().astype(float), minlength=job_count * len(COLUMNS))
+        sums = sums.reshape(job_count, len(COLUMNS))
+        counts = counts.reshape(job_count, len(COLUMNS))
+        sessions_per_job = np.bincount(codes, minlength=job_count)
+
+        result = {}
+        for code in np.nonzero(sessions_per_job)[0]:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = sums[code] / counts[code]
+            result[self._job_titles[code]] = {
+                "count": int(sessions_per_job[code]),
+                "means": {
+                    column: round(float(means[index]), 2)
+                    for index, column in enumerate(COLUMNS) if counts[code][index] > 0
+                }
+            }
+        return result
+
+    def _apply_record(self, session_id, job_title, values):
+        key = _job_key(job_title)
+        code = self._job_index.get(key)
+        if code is None:
+            code = self._job_index[key] = len(self._job_titles)
+            self._job_titles.append((job_title or "").strip())
+
+        row = self._rows.get(session_id)
+        if row is None:
+            row = self._size
+            self._ensure_capacity(row + 1)
+            self._rows[session_id] = row
+            self._session_ids.append(session_id)
+            self._size += 1
+        self._scores[row] = values
+        self._job_codes[row] = code
+        self._cache = {}
+
+    def _apply_remove(self, session_id) -> bool:
+        row = self._rows.pop(session_id, None)
+        if row is None:
+            return False
+        self._job_codes[row] = -1
+        self._scores[row] = np.nan
+        self._cache = {}
+        return True
+
+    def _score_vector(self, analysis: Dict) -> np.ndarray:
+        category_scores = analysis.get("category_scores") or {}
+        values = []
+        for column in COLUMNS:
+            raw = analysis.get(column) if column not in CATEGORIES else category_scores.get(column)
+            try:
+                values.append(float(raw))
+            except (TypeError, ValueError):
+                values.append(np.nan)
+        return np.array(values)
+
+    def _ensure_capacity(self, size: int):
+        if size <= self._scores.shape[0]:
+            return
+        capacity = max(size, self._scores.shape[0] * 2, 64)
+        scores = np.full((capacity, len(COLUMNS)), np.nan)
+        scores[:self._size] = self._scores[:self._size]
+        codes = np.full(capacity, -1, dtype=np.int32)
+        codes[:self._size] = self._job_codes[:self._size]
+        self._scores = scores
+        self._job_codes = codes
+
+    def _append(self, entry):
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._journal_entries += 1
+        if self._journal_entries >= max(COMPACT_MIN_ENTRIES, self._size):
+            self._save()
+
+    def _save(self):
+        # Write a full snapshot, then empty the journal it supersedes. Replaying
+        # a journal over a snapshot that already holds it is harmless.
+        temp_path = f"{self.store_path}.tmp.npz"
+        np.savez(
+            temp_path,
+            scores=self._scores[:self._size],
+            job_codes=self._job_codes[:self._size],
+            session_ids=np.array(self._session_ids, dtype=str),
+            job_titles=np.array(self._job_titles, dtype=str)
+        )
+        os.replace(temp_path, self.store_path)
+        open(self.journal_path, "w").close()
+        self._journal_entries = 0
+
+    def _load(self):
+        # The journal only holds changes since the snapshot; without a snapshot the
+        # store stays empty and is rebuilt from the session files
+        if os.path.exists(self.store_path):
+            try:
+                with np.load(self.store_path) as data:
+                    scores = data["scores"]
+                    job_codes = data["job_codes"].astype(np.int32)
+                    session_ids = data["session_ids"].tolist()
+                    job_titles = data["job_titles"].tolist()
+            except Exception as e:
+                print(f"Error loading score analytics from {self.store_path}: {e}")
+                return
+
+            self._ensure_capacity(len(session_ids))
+            self._size = len(session_ids)
+            self._scores[:self._size] = scores
+            self._job_codes[:self._size] = job_codes
+            self._session_ids = session_ids
+            self._job_titles = job_titles
+            self._job_index = {_job_key(title): code for code, title in enumerate(job_titles)}
+            self._rows = {session_id: row for row, session_id in enumerate(session_ids) if job_codes[row] >= 0}
+            self._replay_journal()
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash mid-write
+                    continue
+                if entry.get("op") == "record":
+                    self._apply_record(entry["session_id"], entry.get("job_title"),
+                                       np.array(entry["scores"], dtype=float))
+                elif entry.get("op") == "remove":
+                    self._apply_remove(entry["session_id"])
+                self._journal_entries += 1
@@ -1,17 +1,33 @@
 import json
 import os
+import threading
 import uuid
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from services.usage_tracker import add_to_usage, empty_usage
+
 class InterviewSessionManager:
-    def __init__(self, sessions_dir="sessions"):
+    def __init__(self, sessions_dir="sessions", transcript_index=None, score_analytics=None):
         self.sessions_dir = sessions_dir
+        self.transcript_index = transcript_index
+        self.score_analytics = score_analytics
+        # Serializes read-modify-write cycles on session files
+        self._lock = threading.RLock()
         os.makedirs(self.sessions_dir, exist_ok=True)
+        
+        # Backfill fresh derived stores from the sessions already on disk
+        if self.transcript_index is not None and self.transcript_index.is_empty():
+            self._notify(self.transcript_index, "rebuild", self.iter_sessions())
+        if self.score_analytics is not None and self.score_analytics.is_empty():
+            self._notify(self.score_analytics, "rebuild", self.iter_sessions())
     
-    def create_session(self, candidate_name: str, job_title: str, resume_text: str = "", job_description: str = "") -> str:
+    def create_session(self, candidate_name: str, job_title: str, resume_text: str = "", job_description: str = "",
+                       adaptive: bool = False, max_speculative_calls: int = 0) -> str:
         """
-        Create a new interview session
+        Create a new interview session.
+        Adaptive sessions may replace upcoming questions with follow-ups
+        generated in the background, up to max_speculative_calls per session.
         """
         session_id = str(uuid.uuid4())
         session_data = {
@@ -25,10 +41,20 @@ class InterviewSessionManager:
             "questions": [],
             "conversation": [],
             "current_question_index": 0,
-            "analysis": None
+            "analysis": None,
+            "adaptive": adaptive
         }
+        if adaptive:
+            session_data.update({
+                "max_speculative_calls": max_speculative_calls,
+                "speculative_calls": 0,
+                "last_served_index": -1,
+                "pending_followups": [],
+                "followups": {}
+            })
         
         self._save_session(session_id, session_data)
+        self._notify(self.transcript_index, "index_session", session_data)
         return session_id
     
     def get_session(self, session_id: str) -> Optional[Dict]:
@@ -49,12 +75,13 @@ class InterviewSessionManager:
         Update session data
         """
         try:
-            session_data = self.get_session(session_id)
-            if session_data:
-                session_data.update(updates)
-                session_data["updated_at"] = datetime.now().isoformat()
-                self._save_session(session_id, session_data)
-                return True
+            with self._lock:
+                session_data = self.get_session(session_id)
+                if session_data:
+                    session_data.update(updates)
+                    session_data["updated_at"] = datetime.now().isoformat()
+                    self._save_session(session_id, session_data)
+                    return True
         except Exception as e:
             print(f"Error updating session {session_id}: {e}")
         return False
@@ -63,57 +90,135 @@ class InterviewSessionManager:
         """
         Add generated questions to session
         """
-        return self.update_session(session_id, {
+        success = self.update_session(session_id, {
             "questions": questions,
             "status": "questions_generated"
         })
+        if success:
+            self._notify(self.transcript_index, "update_status", session_id, "questions_generated")
+        return success
     
     def add_qa_pair(self, session_id: str, question: str, answer: str, question_id: int = None) -> bool:
         """
         Add question-answer pair to conversation
         """
-        session_data = self.get_session(session_id)
-        if session_data:
-            qa_pair = {
-                "question_id": question_id,
-                "question": question,
-                "answer": answer,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            conversation = session_data.get("conversation", [])
-            conversation.append(qa_pair)
-            
-            return self.update_session(session_id, {
-                "conversation": conversation,
-                "current_question_index": len(conversation),
-                "status": "in_progress"
-            })
+        with self._lock:
+            session_data = self.get_session(session_id)
+            if session_data:
+                qa_pair = {
+                    "question_id": question_id,
+                    "question": question,
+                    "answer": answer,
+                    "timestamp": datetime.now().isoformat()
+                }
+                
+                conversation = session_data.get("conversation", [])
+                conversation.append(qa_pair)
+                
+                success = self.update_session(session_id, {
+                    "conversation": conversation,
+                    "current_question_index": len(conversation),
+                    "status": "in_progress"
+                })
+                if success:
+                    self._notify(self.transcript_index, "add_qa_pair", session_id, qa_pair, "in_progress")
+                return success
         return False
     
     def complete_session(self, session_id: str, analysis: Dict) -> bool:
         """
         Mark session as completed with analysis
         """
-        return self.update_session(session_id, {
+        success = self.update_session(session_id, {
             "status": "completed",
             "analysis": analysis,
             "completed_at": datetime.now().isoformat()
         })
+        if success and analysis:
+            self._notify(self.transcript_index, "add_analysis", session_id, analysis, "completed")
+            if not analysis.get("fallback"):
+                session_data = self.get_session(session_id)
+                self._notify(self.score_analytics, "record", session_id, session_data.get("job_title"), analysis)
+        return success
+    
+    def record_llm_usage(self, session_id: str, record: Dict) -> bool:
+        """
+        Add a model call's token and latency usage to the session's totals
+        """
+        with self._lock:
+            session_data = self.get_session(session_id)
+            if session_data:
+                llm_usage = session_data.get("llm_usage") or empty_usage()
+                llm_usage.setdefault("by_endpoint", {})
+                add_to_usage(llm_usage, record)
+                add_to_usage(llm_usage["by_endpoint"].setdefault(record["endpoint"], empty_usage()), record)
+                return self.update_session(session_id, {"llm_usage": llm_usage})
+        return False
     
     def get_next_question(self, session_id: str) -> Optional[Dict]:
         """
         Get the next question for the interview
         """
-        session_data = self.get_session(session_id)
-        if session_data:
-            questions = session_data.get("questions", [])
-            current_index = session_data.get("current_question_index", 0)
-            
-            if current_index < len(questions):
-                return questions[current_index]
+        with self._lock:
+            session_data = self.get_session(session_id)
+            if session_data:
+                questions = session_data.get("questions", [])
+                current_index = session_data.get("current_question_index", 0)
+                
+                if current_index < len(questions):
+                    if session_data.get("adaptive") and current_index > session_data["last_served_index"]:
+                        followup = session_data["followups"].pop(str(current_index), None)
+                        if followup:
+                            # Swap in the follow-up generated while the previous answer was given
+                            questions[current_index] = followup
+                        self.update_session(session_id, {
+                            "questions": questions,
+                            "followups": session_data["followups"],
+                            "last_served_index": current_index
+                        })
+                    return questions[current_index]
         return None
     
+    def reserve_followup(self, session_id: str, slot: int) -> bool:
+        """
+        Claim a speculative follow-up generation for question slot `slot`.
+        Returns False if the session is not adaptive, the slot is already
+        answered, claimed or filled, or the session's cap is used up.
+        """
+        with self._lock:
+            session_data = self.get_session(session_id)
+            if not session_data or not session_data.get("adaptive"):
+                return False
+            if slot >= len(session_data.get("questions", [])) or slot <= session_data["last_served_index"]:
+                return False
+            if slot in session_data["pending_followups"] or str(slot) in session_data["followups"]:
+                return False
+            if session_data["speculative_calls"] >= session_data["max_speculative_calls"]:
+                return False
+            return self.update_session(session_id, {
+                "speculative_calls": session_data["speculative_calls"] + 1,
+                "pending_followups": session_data["pending_followups"] + [slot]
+            })
+    
+    def store_followup(self, session_id: str, slot: int, question: Optional[Dict]) -> bool:
+        """
+        Record the outcome of a reserved follow-up generation. The question
+        is kept only if slot `slot` has not been served yet.
+        """
+        with self._lock:
+            session_data = self.get_session(session_id)
+            if not session_data or not session_data.get("adaptive"):
+                return False
+            pending = [s for s in session_data["pending_followups"] if s != slot]
+            updates = {"pending_followups": pending}
+            stored = question is not None and slot > session_data["last_served_index"]
+            if stored:
+                followups = session_data["followups"]
+                followups[str(slot)] = question
+                updates["followups"] = followups
+            self.update_session(session_id, updates)
+            return stored
+    
     def list_sessions(self, limit: int = 50) -> List[Dict]:
         """
         List all sessions with basic info
@@ -152,15 +257,42 @@ class InterviewSessionManager:
             session_file = os.path.join(self.sessions_dir, f"{session_id}.json")
             if os.path.exists(session_file):
                 os.remove(session_file)
+                self._notify(self.transcript_index, "delete_session", session_id)
+                self._notify(self.score_analytics, "remove", session_id)
                 return True
         except Exception as e:
             print(f"Error deleting session {session_id}: {e}")
         return False
     
+    def iter_sessions(self):
+        """
+        Yield the full data of every stored session
+        """
+        for filename in os.listdir(self.sessions_dir):
+            if filename.endswith('.json'):
+                session_data = self.get_session(filename[:-5])
+                if session_data:
+                    yield session_data
+    
+    def _notify(self, store, method: str, *args):
+        """
+        Forward a change to a derived store (transcript index, score
+        analytics); store failures never fail the session write itself
+        """
+        if store is None:
+            return
+        try:
+            getattr(store, method)(*args)
+        except Exception as e:
+            print(f"Error updating {type(store).__name__} ({method}): {e}")
+    
     def _save_session(self, session_id: str, session_data: Dict):
         """
         Save session data to file
         """
         session_file = os.path.join(self.sessions_dir, f"{session_id}.json")
-        with open(session_file, 'w') as f:
+        # Write-then-rename so concurrent readers never see a partial file
+        temp_file = f"{session_file}.tmp"
+        with open(temp_file, 'w') as f:
             json.dump(session_data, f, indent=2)
+        os.replace(temp_file, session_file)
@@ -0,0 +1,12 @@
+import os
+
+from services.score_analytics import ScoreAnalytics
+from services.session_manager import InterviewSessionManager
+from services.transcript_index import TranscriptIndex
+from services.usage_tracker import usage_tracker
+
+# Shared by the sessions and documents blueprints
+transcript_index = TranscriptIndex(os.getenv('TRANSCRIPT_INDEX_PATH', 'transcript_index.db'))
+score_analytics = ScoreAnalytics(os.getenv('SCORE_ANALYTICS_PATH', 'score_analytics.npz'))
+session_manager = InterviewSessionManager(transcript_index=transcript_index, score_analytics=score_analytics)
+usage_tracker.add_listener(session_manager.record_llm_usage)
@@ -0,0 +1,250 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import wait
+from typing import Dict, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+from services.voice_activity import SpeechSegmenter
+from services.worker_pool import WorkerPoolBusy
+
+# New streams are refused (503) beyond this many open ones, so recognition keeps up with live audio
+STREAM_MAX_OPEN = int(os.getenv('STREAM_MAX_OPEN', '16'))
+# Finished utterances the worker pool has not accepted yet; chunks are refused (503) beyond this
+STREAM_MAX_BACKLOG_MS = int(os.getenv('STREAM_MAX_BACKLOG_MS', '30000'))
+STREAM_RETRY_AFTER = int(os.getenv('STREAM_RETRY_AFTER', '5'))
+# Re-recognize the utterance in progress at most this often for the partial transcript
+STREAM_PARTIAL_INTERVAL_MS = int(os.getenv('STREAM_PARTIAL_INTERVAL_MS', '1000'))
+# Utterances without a pause are cut here so the buffer (and each recognition) stays bounded
+STREAM_MAX_SEGMENT_MS = int(os.getenv('STREAM_MAX_SEGMENT_MS', '15000'))
+STREAM_IDLE_TIMEOUT = int(os.getenv('STREAM_IDLE_TIMEOUT', '120'))
+STREAM_FINISH_TIMEOUT = float(os.getenv('STREAM_FINISH_TIMEOUT', '30'))
+SUPPORTED_SAMPLE_RATES = (8000, 16000, 22050, 24000, 32000, 44100, 48000, 88200, 96000)
+
+
+class SpeechStream:
+    """
+    Incremental recognition of one live recording, fed as raw 16-bit mono
+    PCM chunks.
+
+    Incoming audio is split into utterances with the same energy VAD as
+    uploads, run incrementally over each new chunk. An utterance is final
+    once it is followed by a pause longer than VAD_MAX_PAUSE_MS (or reaches
+    STREAM_MAX_SEGMENT_MS); it is then recognized on the shared voice worker
+    pool and dropped from the buffer. The utterance still in progress is
+    re-recognized every STREAM_PARTIAL_INTERVAL_MS for the partial
+    transcript. When the recording stops only the last utterance is left to
+    recognize, so the final transcript is ready almost at once.
+
+    Final utterances the pool has no room for are kept and submitted again
+    with the next chunk. feed() raises WorkerPoolBusy, without taking the
+    chunk, once more than STREAM_MAX_BACKLOG_MS of them are waiting, and
+    finish() raises it while any are; both can simply be retried.
+    """
+
+    def __init__(self, stt_engine, executor, sample_rate: int = 16000):
+        self.stream_id = uuid.uuid4().hex
+        self.stt_engine = stt_engine
+        self.executor = executor
+        self.sample_rate = sample_rate
+        self.last_activity = time.monotonic()
+        self._lock = threading.Lock()
+        self._segmenter = SpeechSegmenter(sample_rate, STREAM_MAX_SEGMENT_MS)
+        self._buffer = bytearray()
+        self._buffer_start = 0  # stream offset (in samples) of the buffer's first sample
+        self._received_samples = 0
+        self._segments = []  # final utterances: {"text", "done", "error"}, in speaking order
+        self._unsubmitted = []  # (segment, audio) of final utterances not accepted by the pool yet
+        self._futures = []
+        self._partial = ''
+        self._partial_generation = 0  # bumped whenever the utterance in progress is finalized
+        self._partial_pending = False
+        self._partial_samples = 0
+        self._finished = False
+
+    def feed(self, pcm: bytes) -> Dict:
+        """
+        Append a chunk of audio; returns the transcript state so far
+        """
+        if len(pcm) % 2:
+            raise ValueError('Audio chunks must contain whole 16-bit samples')
+        with self._lock:
+            if self._finished:
+                raise ValueError('Stream is already finished')
+            self.last_activity = time.monotonic()
+            self._submit_unsubmitted()
+            backlog = sum(len(audio_data.frame_data) // 2 for _, audio_data in self._unsubmitted)
+            if backlog > self.sample_rate * STREAM_MAX_BACKLOG_MS // 1000:
+                raise WorkerPoolBusy(self.executor.name, self.executor.retry_after)
+            self._buffer.extend(pcm)
+            self._received_samples += len(pcm) // 2
+            self._advance(self._segmenter.push(np.frombuffer(pcm, dtype='<i2')), final=False)
+            return self._state()
+
+    def finish(self, timeout: float = STREAM_FINISH_TIMEOUT) -> Dict:
+        """
+        Finalize the utterance in progress and wait for all recognitions;
+        returns the final transcript
+        """
+        with self._lock:
+            self.last_activity = time.monotonic()
+            if not self._finished:
+                self._finished = True
+                self._advance(self._segmenter.flush(), final=True)
+            self._submit_unsubmitted()
+            if self._unsubmitted:
+                raise WorkerPoolBusy(self.executor.name, self.executor.retry_after)
+            futures = list(self._futures)
+        wait(futures, timeout=timeout)
+        with self._lock:
+            state = self._state()
+            state["final"] = True
+            state["errors"] = [segment["error"] for segment in self._segments if segment["error"]]
+            return state
+
+    def state(self) -> Dict:
+        with self._lock:
+            return self._state()
+
+    def _advance(self, completed, final):
+        for start, stop in completed:
+            self._submit_final(self._audio(start, stop))
+        self._submit_unsubmitted()
+        if not final:
+            in_progress = self._segmenter.open_segment()
+            if in_progress:
+                self._maybe_submit_partial(self._audio(*in_progress))
+        keep_from = self._segmenter.keep_from()
+        if keep_from > self._buffer_start:
+            del self._buffer[:(keep_from - self._buffer_start) * 2]
+            self._buffer_start = keep_from
+
+    def _audio(self, start, stop):
+        pcm = bytes(self._buffer[(start - self._buffer_start) * 2:(stop - self._buffer_start) * 2])
+        return sr.AudioData(pcm, self.sample_rate, 2)
+
+    def _submit_final(self, audio_data):
+        segment = {"text": None, "done": False, "error": None}
+        self._segments.append(segment)
+        self._partial = ''
+        self._partial_generation += 1
+        self._partial_samples = 0
+        self._unsubmitted.append((segment, audio_data))
+
+    def _submit_unsubmitted(self):
+        # In speaking order; stop at the first one the pool has no room for
+        capacity = self.executor.max_workers + self.executor.max_queue
+        while self._unsubmitted and self.executor.stats()["in_flight"] < capacity:
+            segment, audio_data = self._unsubmitted[0]
+            try:
+                self._futures.append(self.executor.submit(self._recognize_final, segment, audio_data))
+            except WorkerPoolBusy:
+                return
+            self._unsubmitted.pop(0)
+
+    def _maybe_submit_partial(self, audio_data):
+        interval = self.sample_rate * STREAM_PARTIAL_INTERVAL_MS // 1000
+        samples = len(audio_data.frame_data) // 2
+        if self._partial_pending or self._unsubmitted or samples - self._partial_samples < interval:
+            return
+        # Partials are best effort: they only use an idle worker, never queue behind other work
+        if self.executor.stats()["in_flight"] >= self.executor.max_workers:
+            return
+        try:
+            self.executor.submit(self._recognize_partial, self._partial_generation, audio_data)
+        except WorkerPoolBusy:
+            return
+        self._partial_pending = True
+        self._partial_samples = samples
+
+    def _recognize_final(self, segment, audio_data):
+        text, error = self._recognize(audio_data)
+        with self._lock:
+            segment["text"] = text
+            segment["error"] = error
+            segment["done"] = True
+
+    def _recognize_partial(self, generation, audio_data):
+        text, _ = self._recognize(audio_data)
+        with self._lock:
+            self._partial_pending = False
+            # Ignore partials for an utterance that has been finalized meanwhile
+            if generation == self._partial_generation and text:
+                self._partial = text
+
+    def _recognize(self, audio_data):
+        try:
+            return self.stt_engine.recognize(audio_data), None
+        except sr.UnknownValueError:
+            return '', None
+        except sr.RequestError as e:
+            return '', f"Error with speech recognition service: {e}"
+        except Exception as e:
+            return '', f"Error recognizing speech: {e}"
+
+    def _state(self):
+        # Only the recognized prefix is reported, so the text never reorders
+        texts = []
+        pending = 0
+        for segment in self._segments:
+            if not segment["done"]:
+                pending = len(self._segments) - len(texts)
+                break
+            texts.append(segment["text"])
+        return {
+            "stream_id": self.stream_id,
+            "text": ' '.join(text for text in texts if text),
+            "partial": self._partial,
+            "segments": len(self._segments),
+            "pending": pending,
+            "received_ms": round(1000 * self._received_samples / self.sample_rate),
+            "engine": self.stt_engine.name,
+            "final": False
+        }
+
+
+class SpeechStreams:
+    """
+    Open speech streams, keyed by stream id. Recognition runs on executor, a
+    BoundedExecutor shared with the other voice operations. Streams that
+    receive nothing for idle_seconds are discarded. At most max_open streams
+    are accepted at a time; creating another raises WorkerPoolBusy.
+    """
+
+    def __init__(self, stt_engine, executor, idle_seconds: int = STREAM_IDLE_TIMEOUT,
+                 max_open: int = STREAM_MAX_OPEN):
+        self.stt_engine = stt_engine
+        self.idle_seconds = idle_seconds
+        self.max_open = max_open
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._streams = {}
+
+    def create(self, sample_rate: int = 16000) -> SpeechStream:
+        if sample_rate not in SUPPORTED_SAMPLE_RATES:
+            raise ValueError(f"Unsupported sample rate {sample_rate}")
+        stream = SpeechStream(self.stt_engine, self.executor, sample_rate)
+        with self._lock:
+            self._prune()
+            if len(self._streams) >= self.max_open:
+                raise WorkerPoolBusy('speech-stream', STREAM_RETRY_AFTER)
+            self._streams[stream.stream_id] = stream
+        return stream
+
+    def get(self, stream_id: str) -> Optional[SpeechStream]:
+        with self._lock:
+            self._prune()
+            return self._streams.get(stream_id)
+
+    def close(self, stream_id: str) -> Optional[SpeechStream]:
+        with self._lock:
+            return self._streams.pop(stream_id, None)
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        expired = [stream_id for stream_id, stream in self._streams.items() if stream.last_activity < cutoff]
+        for stream_id in expired:
+            del self._streams[stream_id]
@@ -0,0 +1,145 @@
+import json
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+import speech_recognition as sr
+
+STT_ENGINE = os.getenv('STT_ENGINE', 'google')
+STT_LANGUAGE = os.getenv('STT_LANGUAGE', 'en-US')
+VOSK_MODEL_PATH = os.getenv('VOSK_MODEL_PATH', 'models/vosk')
+WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'base.en')
+WHISPER_CPU_THREADS = int(os.getenv('WHISPER_CPU_THREADS', '0'))  # 0 = library default
+
+
+class SpeechEngineError(Exception):
+    """
+    Raised when a speech-to-text engine is unknown or cannot be loaded
+    """
+
+
+class SpeechEngine(ABC):
+    """
+    Speech-to-text backend. recognize() takes 16-bit mono sr.AudioData and
+    returns the transcript, raising sr.UnknownValueError when nothing was
+    recognized and sr.RequestError when the engine itself fails, like the
+    speech_recognition recognizers do.
+    """
+    name = None
+    offline = False
+    sample_rate = 16000
+
+    @abstractmethod
+    def recognize(self, audio_data: sr.AudioData) -> str:
+        pass
+
+    def _pcm(self, audio_data: sr.AudioData) -> bytes:
+        return audio_data.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+
+
+class GoogleEngine(SpeechEngine):
+    """
+    Google Web Speech API (network, rate-limited)
+    """
+    name = 'google'
+
+    def __init__(self, recognizer=None, language=STT_LANGUAGE):
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def recognize(self, audio_data):
+        return self.recognizer.recognize_google(audio_data, language=self.language)
+
+
+class SphinxEngine(SpeechEngine):
+    """
+    CMU PocketSphinx (offline, CPU). Fast but the least accurate engine.
+    """
+    name = 'sphinx'
+    offline = True
+
+    def __init__(self, recognizer=None, language=STT_LANGUAGE):
+        try:
+            import pocketsphinx  # noqa: F401
+        except ImportError:
+            raise SpeechEngineError('pocketsphinx is not installed')
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def recognize(self, audio_data):
+        return self.recognizer.recognize_sphinx(audio_data, language=self.language)
+
+
+class VoskEngine(SpeechEngine):
+    """
+    Vosk/Kaldi (offline, CPU). The model is loaded once and shared; each
+    call gets its own recognizer, so concurrent requests are safe.
+    """
+    name = 'vosk'
+    offline = True
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        try:
+            import vosk
+        except ImportError:
+            raise SpeechEngineError('vosk is not installed')
+        if not os.path.isdir(model_path):
+            raise SpeechEngineError(f"Vosk model not found at {model_path} (set VOSK_MODEL_PATH)")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_path)
+
+    def recognize(self, audio_data):
+        recognizer = self._vosk.KaldiRecognizer(self.model, self.sample_rate)
+        recognizer.AcceptWaveform(self._pcm(audio_data))
+        text = json.loads(recognizer.FinalResult()).get('text', '').strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class WhisperEngine(SpeechEngine):
+    """
+    Whisper via faster-whisper (CTranslate2) on the CPU with int8 weights,
+    the closest pip-installable equivalent of whisper.cpp in CPU mode
+    """
+    name = 'whisper'
+    offline = True
+
+    def __init__(self, model_name=WHISPER_MODEL, language=STT_LANGUAGE, cpu_threads=WHISPER_CPU_THREADS):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise SpeechEngineError('faster-whisper is not installed')
+        try:
+            self.model = WhisperModel(model_name, device='cpu', compute_type='int8', cpu_threads=cpu_threads)
+        except Exception as e:
+            raise SpeechEngineError(f"Could not load Whisper model {model_name}: {e}")
+        self.language = language.split('-')[0]
+
+    def recognize(self, audio_data):
+        samples = np.frombuffer(self._pcm(audio_data), dtype='<i2').astype(np.float32) / 32768
+        try:
+            segments, _ = self.model.transcribe(samples, language=self.language, beam_size=1)
+            text = ' '.join(segment.text.strip() for segment in segments).strip()
+        except Exception as e:
+            raise sr.RequestError(f"Whisper transcription failed: {e}")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+ENGINES = {engine.name: engine for engine in (GoogleEngine, SphinxEngine, VoskEngine, WhisperEngine)}
+
+
+def create_engine(name=STT_ENGINE, recognizer=None) -> SpeechEngine:
+    """
+    Instantiate the named engine; raises SpeechEngineError if it is unknown
+    or its package/model is missing
+    """
+    engine = ENGINES.get((name or '').lower())
+    if engine is None:
+        raise SpeechEngineError(f"Unknown STT engine '{name}' (choose from {', '.join(ENGINES)})")
+    if engine in (GoogleEngine, SphinxEngine):
+        return engine(recognizer)
+    return engine()
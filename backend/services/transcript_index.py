@@ -0,0 +1,226 @@
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_meta (
+    session_id TEXT PRIMARY KEY,
+    candidate_name TEXT,
+    job_title TEXT,
+    status TEXT,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_session_meta_job_status ON session_meta(job_title, status);
+CREATE INDEX IF NOT EXISTS idx_session_meta_status ON session_meta(status);
+
+CREATE TABLE IF NOT EXISTS transcript_entries (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    question_id TEXT,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transcript_entries_session ON transcript_entries(session_id, kind);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+    content,
+    content='transcript_entries',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS transcript_entries_ai AFTER INSERT ON transcript_entries BEGIN
+    INSERT INTO transcript_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS transcript_entries_ad AFTER DELETE ON transcript_entries BEGIN
+    INSERT INTO transcript_fts(transcript_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+_QUERY_TERM = re.compile(r'\w+\*?', re.UNICODE)
+
+
+class TranscriptIndex:
+    """
+    SQLite FTS5 full-text index over interview questions, answers and
+    analysis feedback, with session metadata for job_title/status filters.
+
+    The FTS table uses external content (transcript_entries), so removing a
+    session is an indexed delete rather than a scan of the full-text table.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def is_empty(self) -> bool:
+        return self._connection().execute("SELECT 1 FROM session_meta LIMIT 1").fetchone() is None
+
+    def index_session(self, session_data: Dict):
+        """
+        (Re)index a whole session: metadata, conversation and analysis
+        """
+        session_id = session_data["session_id"]
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                connection.execute("DELETE FROM transcript_entries WHERE session_id = ?", (session_id,))
+                self._upsert_meta(connection, session_data)
+                for qa_pair in session_data.get("conversation", []):
+                    self._insert_qa_pair(connection, session_id, qa_pair)
+                if session_data.get("analysis"):
+                    self._insert_analysis(connection, session_id, session_data["analysis"])
+
+    def add_qa_pair(self, session_id: str, qa_pair: Dict, status: Optional[str] = None):
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                self._insert_qa_pair(connection, session_id, qa_pair)
+                if status:
+                    connection.execute("UPDATE session_meta SET status = ? WHERE session_id = ?",
+                                       (status, session_id))
+
+    def add_analysis(self, session_id: str, analysis: Dict, status: str = "completed"):
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                connection.execute("DELETE FROM transcript_entries WHERE session_id = ? AND kind = 'feedback'",
+                                   (session_id,))
+                self._insert_analysis(connection, session_id, analysis)
+                connection.execute("UPDATE session_meta SET status = ? WHERE session_id = ?",
+                                   (status, session_id))
+
+    def update_status(self, session_id: str, status: str):
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                connection.execute("UPDATE session_meta SET status = ? WHERE session_id = ?",
+                                   (status, session_id))
+
+    def delete_session(self, session_id: str):
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                connection.execute("DELETE FROM transcript_entries WHERE session_id = ?", (session_id,))
+                connection.execute("DELETE FROM session_meta WHERE session_id = ?", (session_id,))
+
+    def rebuild(self, sessions: Iterable[Dict]) -> int:
+        """
+        Index every session in `sessions`; returns the number indexed
+        """
+        count = 0
+        for session_data in sessions:
+            self.index_session(session_data)
+            count += 1
+        return count
+
+    def search(self, query: str, job_title: Optional[str] = None, status: Optional[str] = None,
+               kind: Optional[str] = None, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """
+        Ranked full-text search. Every word in `query` must match; a trailing
+        '*' on a word makes it a prefix match.
+        """
+        match = build_match_expression(query)
+        if not match:
+            return []
+
+        sql = """
+            SELECT e.session_id, e.kind, e.question_id,
+                   m.candidate_name, m.job_title, m.status,
+                   snippet(transcript_fts, 0, '[', ']', '...', 16) AS snippet,
+                   bm25(transcript_fts) AS score
+            FROM transcript_fts
+            JOIN transcript_entries e ON e.id = transcript_fts.rowid
+            JOIN session_meta m ON m.session_id = e.session_id
+            WHERE transcript_fts MATCH ?
+        """
+        params = [match]
+        if job_title:
+            sql += " AND m.job_title = ?"
+            params.append(job_title)
+        if status:
+            sql += " AND m.status = ?"
+            params.append(status)
+        if kind:
+            sql += " AND e.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY score LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        rows = self._connection().execute(sql, params).fetchall()
+        return [
+            {
+                "session_id": row["session_id"],
+                "candidate_name": row["candidate_name"],
+                "job_title": row["job_title"],
+                "status": row["status"],
+                "kind": row["kind"],
+                "question_id": row["question_id"],
+                "snippet": row["snippet"],
+                "score": round(-row["score"], 4)
+            }
+            for row in rows
+        ]
+
+    def _upsert_meta(self, connection, session_data):
+        connection.execute(
+            """
+            INSERT INTO session_meta (session_id, candidate_name, job_title, status, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                candidate_name = excluded.candidate_name,
+                job_title = excluded.job_title,
+                status = excluded.status
+            """,
+            (session_data["session_id"], session_data.get("candidate_name"), session_data.get("job_title"),
+             session_data.get("status"), session_data.get("created_at"))
+        )
+
+    def _insert_qa_pair(self, connection, session_id, qa_pair):
+        question_id = qa_pair.get("question_id")
+        question_id = str(question_id) if question_id is not None else None
+        entries = [("question", qa_pair.get("question")), ("answer", qa_pair.get("answer"))]
+        connection.executemany(
+            "INSERT INTO transcript_entries (session_id, kind, question_id, content) VALUES (?, ?, ?, ?)",
+            [(session_id, kind, question_id, content) for kind, content in entries if content]
+        )
+
+    def _insert_analysis(self, connection, session_id, analysis):
+        parts = [analysis.get("detailed_feedback") or ""]
+        parts.extend(analysis.get("strengths") or [])
+        parts.extend(analysis.get("areas_for_improvement") or [])
+        content = "\n".join(str(part) for part in parts if part)
+        if content:
+            connection.execute(
+                "INSERT INTO transcript_entries (session_id, kind, question_id, content) VALUES (?, 'feedback', NULL, ?)",
+                (session_id, content)
+            )
+
+
+def build_match_expression(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression (implicit AND of
+    quoted terms), so user input can't inject FTS query syntax
+    """
+    terms = []
+    for term in _QUERY_TERM.findall(query or ""):
+        prefix = term.endswith("*")
+        word = term.rstrip("*")
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import tempfile
+import time
+from typing import BinaryIO, Dict, Optional
+
+
+def format_size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):g} MB"
+    return f"{size / 1024:g} KB"
+
+
+class UploadTooLargeError(Exception):
+    """
+    Raised when an upload exceeds the configured size cap
+    """
+
+
+class UploadStore:
+    """
+    Content-addressed storage for uploaded documents.
+
+    Uploads are streamed in chunks into a temp file inside the store while
+    their SHA-256 is computed, then renamed to <root>/<sha[:2]>/<sha>.<ext>.
+    Identical uploads therefore share one file, same-named uploads never
+    overwrite each other, and partial files are removed on any failure.
+    """
+
+    def __init__(self, root: str, max_bytes: int, chunk_size: int = 64 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.temp_dir = os.path.join(root, '.tmp')
+        os.makedirs(self.temp_dir, exist_ok=True)
+        self._remove_stale_temp_files()
+
+    def path_for(self, sha256: str, extension: str) -> str:
+        return os.path.join(self.root, sha256[:2], f"{sha256}.{extension}")
+
+    def save(self, stream: BinaryIO, extension: str, max_bytes: Optional[int] = None) -> Dict:
+        """
+        Stream `stream` into the store. Returns the stored path, SHA-256,
+        size and whether an identical file was already stored.
+        """
+        writer = self.open_writer(extension, max_bytes)
+        try:
+            while True:
+                chunk = stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            return writer.commit()
+        except BaseException:
+            writer.discard()
+            raise
+
+    def open_writer(self, extension: str, max_bytes: Optional[int] = None) -> 'UploadWriter':
+        """
+        Incremental counterpart of save() for uploads that arrive in pieces,
+        e.g. while a multipart body is being parsed
+        """
+        return UploadWriter(self, extension, self.max_bytes if max_bytes is None else max_bytes)
+
+    def _remove_stale_temp_files(self, max_age_seconds: int = 3600):
+        # Left behind only if the process died mid-upload
+        cutoff = time.time() - max_age_seconds
+        for name in os.listdir(self.temp_dir):
+            path = os.path.join(self.temp_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+class UploadWriter:
+    """
+    One upload being written into an UploadStore: write() the chunks, then
+    commit() to store the file under its hash, or discard() to drop it
+    """
+
+    def __init__(self, store: UploadStore, extension: str, max_bytes: int):
+        self.store = store
+        self.extension = extension
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._temp = tempfile.NamedTemporaryFile(dir=store.temp_dir, suffix=f".{extension}", delete=False)
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(f"File exceeds the {format_size(self.max_bytes)} upload limit")
+        self._digest.update(chunk)
+        self._temp.write(chunk)
+
+    def commit(self) -> Dict:
+        self._temp.close()
+        sha256 = self._digest.hexdigest()
+        path = self.store.path_for(sha256, self.extension)
+        deduplicated = os.path.exists(path)
+        if deduplicated:
+            os.remove(self._temp.name)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._temp.name, path)
+        return {"path": path, "sha256": sha256, "size": self.size, "deduplicated": deduplicated}
+
+    def discard(self):
+        self._temp.close()
+        if os.path.exists(self._temp.name):
+            os.remove(self._temp.name)
@@ -0,0 +1,139 @@
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+USAGE_COUNTERS = ("calls", "errors", "fallbacks", "prompt_tokens", "response_tokens",
+                  "cached_tokens", "cache_hits", "cache_misses")
+
+
+def empty_usage() -> Dict:
+    """
+    Zeroed usage aggregate, as stored per endpoint and per session
+    """
+    usage = {counter: 0 for counter in USAGE_COUNTERS}
+    usage["latency_ms"] = 0.0
+    return usage
+
+
+def add_to_usage(usage: Dict, record: Dict):
+    """
+    Fold a single call record into an aggregate produced by empty_usage()
+    """
+    usage["calls"] += 1
+    usage["errors"] += 1 if record["error"] else 0
+    usage["fallbacks"] += 1 if record["fallback"] else 0
+    usage["prompt_tokens"] += record["prompt_tokens"]
+    usage["response_tokens"] += record["response_tokens"]
+    usage["cached_tokens"] += record["cached_tokens"]
+    usage["cache_hits" if record["cache_hit"] else "cache_misses"] += 1
+    usage["latency_ms"] = round(usage["latency_ms"] + record["latency_ms"], 1)
+
+
+def token_counts(response) -> Dict:
+    """
+    Prompt/response/cached token counts from a Gemini response's usage metadata
+    """
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "response_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+        "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+    }
+
+
+class UsageTracker:
+    """
+    Aggregates per-call Gemini latency and token usage per endpoint, and
+    forwards records tagged with a session id to registered listeners
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._listeners = []
+
+    def add_listener(self, listener: Callable[[str, Dict], None]):
+        """
+        Register a callable invoked as listener(session_id, record) for
+        every call made on behalf of a session
+        """
+        self._listeners.append(listener)
+
+    def record(self, endpoint: str, latency_ms: float, upstream_ms: float = 0.0,
+               prompt_tokens: int = 0, response_tokens: int = 0, cached_tokens: int = 0,
+               fallback: bool = False, error: Optional[str] = None,
+               session_id: Optional[str] = None) -> Dict:
+        """
+        Record one model call
+        """
+        record = {
+            "endpoint": endpoint,
+            "latency_ms": round(latency_ms, 1),
+            "upstream_ms": round(upstream_ms, 1),
+            "prompt_tokens": prompt_tokens,
+            "response_tokens": response_tokens,
+            "cached_tokens": cached_tokens,
+            "cache_hit": cached_tokens > 0,
+            "fallback": fallback,
+            "error": error,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    "usage": empty_usage(),
+                    "latencies": deque(maxlen=self.max_samples),
+                    "upstream": deque(maxlen=self.max_samples)
+                }
+            add_to_usage(stats["usage"], record)
+            stats["latencies"].append(record["latency_ms"])
+            stats["upstream"].append(record["upstream_ms"])
+
+        if session_id:
+            for listener in self._listeners:
+                try:
+                    listener(session_id, record)
+                except Exception as e:
+                    print(f"Error recording usage for session {session_id}: {e}")
+        return record
+
+    def snapshot(self) -> Dict:
+        """
+        Per-endpoint aggregates with latency percentiles, plus overall totals
+        """
+        endpoints = {}
+        totals = empty_usage()
+        with self._lock:
+            for endpoint, stats in self._endpoints.items():
+                usage = dict(stats["usage"])
+                latencies = sorted(stats["latencies"])
+                upstream = list(stats["upstream"])
+                usage.update({
+                    "latency_ms_avg": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+                    "latency_ms_p50": percentile(latencies, 50),
+                    "latency_ms_p95": percentile(latencies, 95),
+                    "upstream_ms_avg": round(sum(upstream) / len(upstream), 1) if upstream else 0.0,
+                })
+                endpoints[endpoint] = usage
+                for counter in USAGE_COUNTERS:
+                    totals[counter] += stats["usage"][counter]
+                totals["latency_ms"] = round(totals["latency_ms"] + stats["usage"]["latency_ms"], 1)
+        return {"endpoints": endpoints, "totals": totals}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list; 0.0 when empty
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# Shared by every GeminiService instance
+usage_tracker = UsageTracker()
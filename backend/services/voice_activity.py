@@ -0,0 +1,198 @@
+import os
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import speech_recognition as sr
+
+VAD_ENABLED = os.getenv('VAD_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+VAD_FRAME_MS = int(os.getenv('VAD_FRAME_MS', '30'))
+# A frame is speech when it is this much louder than the recording's noise floor...
+VAD_MARGIN_DB = float(os.getenv('VAD_MARGIN_DB', '12'))
+# ...and louder than this absolute level (dBFS), so near-digital silence never counts
+VAD_MIN_DBFS = float(os.getenv('VAD_MIN_DBFS', '-50'))
+# Upper bound on the estimated noise floor, so a clip that is speech throughout is not trimmed away
+VAD_MAX_NOISE_FLOOR_DBFS = float(os.getenv('VAD_MAX_NOISE_FLOOR_DBFS', '-55'))
+# Speech kept on either side of detected speech, so word onsets and tails survive
+VAD_PADDING_MS = int(os.getenv('VAD_PADDING_MS', '200'))
+# Pauses longer than this split the recording into segments...
+VAD_MAX_PAUSE_MS = int(os.getenv('VAD_MAX_PAUSE_MS', '700'))
+# ...and are shortened to this much silence when the segments are joined again
+VAD_JOINED_PAUSE_MS = int(os.getenv('VAD_JOINED_PAUSE_MS', '300'))
+# Live audio: the noise floor is estimated over this much of the most recent audio
+VAD_NOISE_HISTORY_MS = int(os.getenv('VAD_NOISE_HISTORY_MS', '30000'))
+
+
+def detect_speech_segments(samples: np.ndarray, sample_rate: int, frame_ms: int = VAD_FRAME_MS,
+                           margin_db: float = VAD_MARGIN_DB, min_dbfs: float = VAD_MIN_DBFS,
+                           padding_ms: int = VAD_PADDING_MS,
+                           max_pause_ms: int = VAD_MAX_PAUSE_MS) -> List[Tuple[int, int]]:
+    """
+    Energy-based voice activity detection on 16-bit mono samples.
+    Returns (start, end) sample offsets of speech segments; segments closer
+    than max_pause_ms are merged.
+    """
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return []
+
+    frames = samples[:frame_count * frame_length].astype(np.float32).reshape(frame_count, frame_length)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    dbfs = 20 * np.log10(np.maximum(rms, 1e-6) / 32768)
+    noise_floor = min(np.percentile(dbfs, 10), VAD_MAX_NOISE_FLOOR_DBFS)
+    speech = dbfs > max(noise_floor + margin_db, min_dbfs)
+    if not speech.any():
+        return []
+
+    # Pad speech runs by dilating the frame mask
+    padding = padding_ms // frame_ms
+    if padding:
+        speech = np.convolve(speech, np.ones(2 * padding + 1), mode='same') > 0
+
+    # Run boundaries: +1 where speech starts, -1 where it stops
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+
+    max_pause = max_pause_ms // frame_ms
+    segments = []
+    for start, stop in zip(starts, stops):
+        if segments and start - segments[-1][1] <= max_pause:
+            segments[-1][1] = stop
+        else:
+            segments.append([start, stop])
+    return [(int(start) * frame_length, int(stop) * frame_length) for start, stop in segments]
+
+class SpeechSegmenter:
+    """
+    Incremental counterpart of detect_speech_segments for live audio.
+
+    Samples are pushed as they arrive and only the new frames are measured;
+    the noise floor is estimated over the last VAD_NOISE_HISTORY_MS. A
+    segment is returned by push() once no later speech could be merged into
+    it (a pause longer than max_pause_ms follows), or when it reaches
+    max_segment_ms. Offsets are absolute sample positions in the stream.
+    """
+
+    def __init__(self, sample_rate: int, max_segment_ms: int, frame_ms: int = VAD_FRAME_MS,
+                 margin_db: float = VAD_MARGIN_DB, min_dbfs: float = VAD_MIN_DBFS,
+                 padding_ms: int = VAD_PADDING_MS, max_pause_ms: int = VAD_MAX_PAUSE_MS,
+                 history_ms: int = VAD_NOISE_HISTORY_MS):
+        self.frame_length = max(1, sample_rate * frame_ms // 1000)
+        self.margin_db = margin_db
+        self.min_dbfs = min_dbfs
+        self.padding = padding_ms // frame_ms
+        self.max_pause = max_pause_ms // frame_ms
+        self.max_segment = max(1, max_segment_ms // frame_ms)
+        self.frames = 0  # whole frames seen so far
+        self._levels = deque(maxlen=max(1, history_ms // frame_ms))  # dBFS of recent frames
+        self._remainder = np.zeros(0, dtype='<i2')  # samples short of a whole frame
+        self._floor = 0  # frame where the last emitted segment stopped
+        self._first = None  # first and last speech frame of the open segment
+        self._last = None
+
+    def push(self, samples: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Add 16-bit mono samples; returns the segments completed by them
+        """
+        if len(self._remainder):
+            samples = np.concatenate((self._remainder, samples))
+        count = len(samples) // self.frame_length
+        self._remainder = samples[count * self.frame_length:].copy()
+        completed = []
+        if count == 0:
+            return completed
+
+        frames = samples[:count * self.frame_length].astype(np.float32).reshape(count, self.frame_length)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        dbfs = 20 * np.log10(np.maximum(rms, 1e-6) / 32768)
+        self._levels.extend(dbfs.tolist())
+        noise_floor = min(np.percentile(self._levels, 10), VAD_MAX_NOISE_FLOOR_DBFS)
+        speech = dbfs > max(noise_floor + self.margin_db, self.min_dbfs)
+
+        start = self.frames
+        for offset in np.flatnonzero(speech):
+            frame = start + int(offset)
+            self._complete(frame, completed)
+            if self._first is None:
+                self._first = frame
+            self._last = frame
+        self.frames += count
+        self._complete(self.frames, completed)
+        return completed
+
+    def flush(self) -> List[Tuple[int, int]]:
+        """
+        End of audio: return the open segment, if any
+        """
+        completed = []
+        if self._first is not None:
+            completed.append(self._emit(min(self._last + self.padding + 1, self.frames)))
+        return completed
+
+    def open_segment(self) -> Optional[Tuple[int, int]]:
+        """
+        The segment still being spoken, as detected so far
+        """
+        if self._first is None:
+            return None
+        start, stop = self._bounds(min(self._last + self.padding + 1, self.frames))
+        return start * self.frame_length, stop * self.frame_length
+
+    def keep_from(self) -> int:
+        """
+        Sample offset before which the audio is no longer needed
+        """
+        if self._first is not None:
+            return self._bounds(self.frames)[0] * self.frame_length
+        # Silence only: keep just enough of it to pad the next segment's onset
+        return max(self._floor, self.frames - self.padding) * self.frame_length
+
+    def _complete(self, frame, completed):
+        # Close the open segment if speech at `frame` could no longer be merged into it
+        if self._first is None:
+            return
+        stop = self._last + self.padding + 1
+        if frame - self.padding - stop > self.max_pause:
+            completed.append(self._emit(stop))
+        elif frame - self._bounds(frame)[0] >= self.max_segment:
+            completed.append(self._emit(frame))
+
+    def _bounds(self, stop):
+        return max(self._first - self.padding, self._floor), stop
+
+    def _emit(self, stop):
+        start, stop = self._bounds(stop)
+        self._floor = stop
+        self._first = None
+        self._last = None
+        return start * self.frame_length, stop * self.frame_length
+
+def trim_silence(audio_data: sr.AudioData, joined_pause_ms: int = VAD_JOINED_PAUSE_MS) -> Tuple[sr.AudioData, Dict]:
+    """
+    Drop leading and trailing silence and shorten long pauses in 16-bit mono
+    audio. Returns the trimmed audio and stats: original and trimmed
+    duration, trim ratio and the number of speech segments.
+    """
+    samples = np.frombuffer(audio_data.get_raw_data(convert_width=2), dtype='<i2')
+    sample_rate = audio_data.sample_rate
+    segments = detect_speech_segments(samples, sample_rate)
+
+    gap = np.zeros(sample_rate * joined_pause_ms // 1000, dtype='<i2')
+    parts = []
+    for index, (start, stop) in enumerate(segments):
+        if index:
+            parts.append(gap)
+        parts.append(samples[start:stop])
+    trimmed = np.concatenate(parts) if parts else np.zeros(0, dtype='<i2')
+
+    original_ms = round(1000 * len(samples) / sample_rate)
+    trimmed_ms = round(1000 * len(trimmed) / sample_rate)
+    stats = {
+        'original_ms': original_ms,
+        'trimmed_ms': trimmed_ms,
+        'trim_ratio': round(1 - trimmed_ms / original_ms, 3) if original_ms else 0.0,
+        'segments': len(segments)
+    }
+    return sr.AudioData(trimmed.tobytes(), sample_rate, 2), stats
@@ -1,17 +1,42 @@
 import speech_recognition as sr
 import pyttsx3
 from gtts import gTTS
+from services.audio_transcoder import TranscodeError, decode_to_audio_data
+from services.stt_engines import STT_ENGINE, SpeechEngineError, create_engine
+from services.voice_activity import VAD_ENABLED, trim_silence
+from services.worker_pool import BoundedExecutor
 import io
 import tempfile
 import os
 from threading import Thread
 import queue
 
+# gTTS voice settings; part of the audio cache key
+GTTS_SETTINGS = {"engine": "gtts", "tld": "com", "slow": False}
+
+# Speech recognition and gTTS synthesis run on a bounded pool, not on request threads
+VOICE_WORKERS = int(os.getenv('VOICE_WORKERS', '4'))
+VOICE_QUEUE_SIZE = int(os.getenv('VOICE_QUEUE_SIZE', '8'))
+LOCAL_TTS_QUEUE_SIZE = int(os.getenv('LOCAL_TTS_QUEUE_SIZE', '4'))
+VOICE_RETRY_AFTER = int(os.getenv('VOICE_RETRY_AFTER', '2'))
+
 class VoiceService:
-    def __init__(self):
+    def __init__(self, audio_cache=None, stt_engine=STT_ENGINE):
         self.recognizer = sr.Recognizer()
+        self.audio_cache = audio_cache
         self.microphone = None
         self.tts_engine = None
+        self.workers = BoundedExecutor(VOICE_WORKERS, VOICE_QUEUE_SIZE, 'voice', VOICE_RETRY_AFTER)
+        # pyttsx3 engines are not thread-safe: one thread creates the engine and runs every utterance
+        self.local_tts = BoundedExecutor(1, LOCAL_TTS_QUEUE_SIZE, 'local-tts', VOICE_RETRY_AFTER)
+        
+        # Speech-to-text engine, selected per deployment (STT_ENGINE)
+        try:
+            self.stt_engine = create_engine(stt_engine, self.recognizer)
+        except SpeechEngineError as e:
+            print(f"Warning: STT engine '{stt_engine}' initialization failed: {e}")
+            print("Falling back to Google speech recognition")
+            self.stt_engine = create_engine('google', self.recognizer)
         
         # Try to initialize microphone (may fail if PyAudio not installed)
         try:
@@ -23,19 +48,31 @@ class VoiceService:
             print(f"Warning: Microphone initialization failed: {e}")
             print("Voice recording from microphone will not be available")
         
-        # Try to initialize text-to-speech engine
+        # Try to initialize text-to-speech engine (on its owner thread)
+        self.tts_engine = self.local_tts.run(self._init_local_tts)
+    
+    def _init_local_tts(self):
         try:
-            self.tts_engine = pyttsx3.init()
-            self.tts_engine.setProperty('rate', 150)  # Speech rate
-            self.tts_engine.setProperty('volume', 0.9)  # Volume level
+            tts_engine = pyttsx3.init()
+            tts_engine.setProperty('rate', 150)  # Speech rate
+            tts_engine.setProperty('volume', 0.9)  # Volume level
+            return tts_engine
         except Exception as e:
             print(f"Warning: TTS engine initialization failed: {e}")
             print("Local text-to-speech will not be available")
+            return None
+    
+    # The public voice operations below block on the network, the
+    # recognizer or audio output, so they run on the worker pools and raise
+    # WorkerPoolBusy when the pool and its queue are full.
     
     def speech_to_text(self, audio_data=None, timeout=10, phrase_time_limit=None):
         """
         Convert speech to text using microphone input
         """
+        return self.workers.run(self._speech_to_text, audio_data, timeout, phrase_time_limit)
+    
+    def _speech_to_text(self, audio_data, timeout, phrase_time_limit):
         if self.microphone is None:
             return {"success": False, "error": "Microphone not available. Please install PyAudio."}
         
@@ -51,8 +88,8 @@ class VoiceService:
                     )
             
             # Convert speech to text
-            text = self.recognizer.recognize_google(audio_data)
-            return {"success": True, "text": text}
+            text = self.stt_engine.recognize(audio_data)
+            return {"success": True, "text": text, "engine": self.stt_engine.name}
             
         except sr.WaitTimeoutError:
             return {"success": False, "error": "Listening timeout"}
@@ -67,6 +104,9 @@ class VoiceService:
         """
         Convert text to speech and return audio file path
         """
+        return self.workers.run(self._text_to_speech_file, text, language)
+    
+    def _text_to_speech_file(self, text, language):
         try:
             # Create temporary file for audio
             temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
@@ -81,10 +121,110 @@ class VoiceService:
         except Exception as e:
             return {"success": False, "error": f"Error generating speech: {e}"}
     
+    def text_to_speech_cached(self, text, language='en'):
+        """
+        Like text_to_speech_file, but serves repeated (text, language) pairs
+        from the audio cache. The returned file belongs to the cache and
+        must not be deleted by the caller.
+        """
+        if self.audio_cache is None:
+            return self.text_to_speech_file(text, language)
+        
+        # Cache hits are served without taking a worker
+        key = self.speech_cache_key(text, language)
+        audio_file = self.audio_cache.get(key)
+        if audio_file is not None:
+            return {"success": True, "audio_file": audio_file, "cache_key": key, "cached": True}
+        return self.workers.run(self._text_to_speech_cached, text, language)
+    
+    def _text_to_speech_cached(self, text, language):
+        try:
+            key = self.speech_cache_key(text, language)
+            
+            def synthesize(path):
+                tts = gTTS(text=text, lang=language, slow=GTTS_SETTINGS["slow"], tld=GTTS_SETTINGS["tld"])
+                tts.save(path)
+            
+            audio_file, cached = self.audio_cache.get_or_create(key, synthesize)
+            return {"success": True, "audio_file": audio_file, "cache_key": key, "cached": cached}
+            
+        except Exception as e:
+            return {"success": False, "error": f"Error generating speech: {e}"}
+    
+    def speech_cache_key(self, text, language='en'):
+        return self.audio_cache.make_key(text, language, GTTS_SETTINGS)
+    
+    def text_to_speech_stream(self, text, language='en'):
+        """
+        Convert text to speech as a stream of MP3 chunks, one per gTTS text
+        segment, so playback can start before synthesis finishes. The whole
+        synthesis runs as one task on the worker pool and hands chunks over
+        as they are produced; the first one is waited for before returning,
+        so synthesis errors are reported here rather than in the middle of a
+        response. With an audio cache, synthesis holds the cache's per-key
+        lock and the finished file is cached, even if the client disconnects.
+        """
+        key = self.speech_cache_key(text, language) if self.audio_cache is not None else None
+        chunks = queue.Queue()
+        self.workers.submit(self._text_to_speech_stream, text, language, key, chunks)
+        first = chunks.get()
+        if isinstance(first, Exception):
+            return {"success": False, "error": f"Error generating speech: {first}"}
+        
+        def stream():
+            chunk = first
+            while chunk is not None:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+                chunk = chunks.get()
+        
+        return {"success": True, "chunks": stream(), "cache_key": key, "cached": False}
+    
+    def _text_to_speech_stream(self, text, language, key, chunks):
+        # Puts each chunk on the queue, then None when done or the exception on failure
+        try:
+            if key is None:
+                self._synthesize_chunks(text, language, chunks, None)
+            else:
+                with self.audio_cache.synthesis_lock(key):
+                    audio_file = self.audio_cache.get(key)
+                    if audio_file is not None:
+                        # Synthesized (e.g. prefetched) while this request waited for the lock
+                        with open(audio_file, 'rb') as f:
+                            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                                chunks.put(chunk)
+                    else:
+                        self._synthesize_chunks(text, language, chunks, key)
+            chunks.put(None)
+        except Exception as e:
+            chunks.put(e)
+    
+    def _synthesize_chunks(self, text, language, chunks, key):
+        # Tee the chunks into the audio cache; a failed synthesis is not cached
+        tts = gTTS(text=text, lang=language, slow=GTTS_SETTINGS["slow"], tld=GTTS_SETTINGS["tld"])
+        temp = open(self.audio_cache.temp_path(), 'wb') if key else None
+        try:
+            for chunk in tts.stream():
+                if temp:
+                    temp.write(chunk)
+                chunks.put(chunk)
+        except Exception:
+            if temp:
+                temp.close()
+                self.cleanup_temp_files(temp.name)
+            raise
+        if temp:
+            temp.close()
+            self.audio_cache.put_file(key, temp.name)
+    
     def text_to_speech_local(self, text):
         """
         Convert text to speech using local TTS engine (pyttsx3)
         """
+        return self.local_tts.run(self._text_to_speech_local, text)
+    
+    def _text_to_speech_local(self, text):
         if self.tts_engine is None:
             return {"success": False, "error": "Local TTS engine not available"}
         
@@ -101,11 +241,14 @@ class VoiceService:
         """
         Convert audio file to text
         """
+        return self.workers.run(self._speech_to_text_from_file, audio_file_path)
+    
+    def _speech_to_text_from_file(self, audio_file_path):
         try:
             with sr.AudioFile(audio_file_path) as source:
                 audio_data = self.recognizer.record(source)
-                text = self.recognizer.recognize_google(audio_data)
-                return {"success": True, "text": text}
+                text = self.stt_engine.recognize(audio_data)
+                return {"success": True, "text": text, "engine": self.stt_engine.name}
                 
         except sr.UnknownValueError:
             return {"success": False, "error": "Could not understand audio from file"}
@@ -114,6 +257,38 @@ class VoiceService:
         except Exception as e:
             return {"success": False, "error": f"Error processing audio file: {e}"}
     
+    def speech_to_text_from_stream(self, stream):
+        """
+        Convert an audio upload of any supported container (WAV/AIFF/FLAC,
+        or webm/ogg/mp3/mp4 via PyAV or ffmpeg) to text. stream is a seekable
+        binary stream such as an uploaded file's; it is decoded where it is,
+        without copying it into bytes or saving it to a file first. The
+        audio is transcoded to 16 kHz mono PCM before recognition, and
+        silence is trimmed unless VAD is disabled; "vad" reports how much.
+        """
+        return self.workers.run(self._speech_to_text_from_stream, stream)
+    
+    def _speech_to_text_from_stream(self, stream):
+        try:
+            audio_data = decode_to_audio_data(stream)
+            vad = None
+            if VAD_ENABLED:
+                audio_data, vad = trim_silence(audio_data)
+                if vad["segments"] == 0:
+                    # Nothing to send to the recognizer
+                    return {"success": False, "error": "No speech detected", "vad": vad}
+            text = self.stt_engine.recognize(audio_data)
+            return {"success": True, "text": text, "vad": vad, "engine": self.stt_engine.name}
+            
+        except TranscodeError as e:
+            return {"success": False, "error": f"Unsupported or corrupt audio: {e}"}
+        except sr.UnknownValueError:
+            return {"success": False, "error": "Could not understand audio from file"}
+        except sr.RequestError as e:
+            return {"success": False, "error": f"Error with speech recognition service: {e}"}
+        except Exception as e:
+            return {"success": False, "error": f"Error processing audio file: {e}"}
+    
     def cleanup_temp_files(self, file_path):
         """
         Clean up temporary audio files
@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+
+
+class WorkerPoolBusy(Exception):
+    """
+    Raised when a worker pool and its queue are full; the request should be
+    retried after retry_after seconds
+    """
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} workers are busy, please retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded queue. At most max_workers tasks run and
+    max_queue more wait; submitting beyond that raises WorkerPoolBusy at
+    once instead of letting requests pile up behind the pool.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str, retry_after: int = 2):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise WorkerPoolBusy(self.name, self.retry_after)
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, func: Callable, *args, **kwargs):
+        """
+        Run func in the pool and wait for its result
+        """
+        return self.submit(func, *args, **kwargs).result()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "workers": self.max_workers,
+                "queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected
+            }
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
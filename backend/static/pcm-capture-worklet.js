@@ -0,0 +1,28 @@
+// Audio worklet for server-side live recognition: collects microphone
+// samples at the context's native rate and posts them to the page as
+// 16-bit PCM chunks of processorOptions.chunkFrames samples
+class PcmCaptureProcessor extends AudioWorkletProcessor {
+    constructor(options) {
+        super();
+        this.chunk = new Int16Array(options.processorOptions.chunkFrames);
+        this.length = 0;
+    }
+
+    process(inputs) {
+        const input = inputs[0][0];
+        if (!input) return true;
+
+        for (let i = 0; i < input.length; i++) {
+            this.chunk[this.length++] = Math.max(-1, Math.min(1, input[i])) * 0x7FFF;
+            if (this.length === this.chunk.length) {
+                const buffer = this.chunk.buffer;
+                this.port.postMessage(buffer, [buffer]);
+                this.chunk = new Int16Array(this.chunk.length);
+                this.length = 0;
+            }
+        }
+        return true;
+    }
+}
+
+registerProcessor('pcm-capture', PcmCaptureProcessor);
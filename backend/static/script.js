@@ -13,6 +13,7 @@ let answerStartTime = null;
 let currentAudio = null; // Track current audio playback
 let recognition = null; // Web Speech Recognition
 let isListening = false;
+let speechStream = null; // Server-side live recognition, used when the Web Speech API is missing
 
 // DOM loaded event
 document.addEventListener('DOMContentLoaded', function() {
@@ -40,8 +41,7 @@ function initializeSpeechRecognition() {
     const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
     
     if (!SpeechRecognition) {
-        console.error('Speech Recognition not supported');
-        showStatus('❌ Speech Recognition not supported in this browser. Please use Chrome or Edge.', 'error');
+        console.warn('Speech Recognition not supported; answers will be transcribed by the server');
         return;
     }
     
@@ -142,9 +142,15 @@ async function handleFileUpload(type, input) {
             body: formData
         });
         
-        const result = await response.json();
+        let result = await response.json();
         
-        if (response.ok) {
+        // Large documents are extracted in the background: poll until the text is ready
+        if (response.status === 202) {
+            showStatus('Extracting text from document...', 'info');
+            result = await waitForExtraction(result.status_url);
+        }
+        
+        if (response.ok && result.status !== 'failed') {
             if (type === 'resume') {
                 resumeText = result.text;
                 document.getElementById('resumeUploadText').innerHTML = 
@@ -163,6 +169,25 @@ async function handleFileUpload(type, input) {
     }
 }
 
+// Poll with backoff (1s, 1.5s, ... up to 10s between polls) until the job ends or timeoutMs passes
+async function waitForExtraction(statusUrl, timeoutMs = 5 * 60 * 1000) {
+    const deadline = Date.now() + timeoutMs;
+    let intervalMs = 1000;
+    while (Date.now() + intervalMs < deadline) {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+        intervalMs = Math.min(intervalMs * 1.5, 10000);
+        const response = await fetch(statusUrl);
+        const status = await response.json();
+        if (!response.ok) {
+            return { status: 'failed', error: status.error };
+        }
+        if (status.status === 'completed' || status.status === 'failed') {
+            return status;
+        }
+    }
+    return { status: 'failed', error: 'Timed out waiting for the document to be processed' };
+}
+
 // Generate questions using AI
 async function generateQuestions() {
     const candidateName = document.getElementById('candidateName').value;
@@ -323,17 +348,29 @@ function displayCurrentQuestion() {
 
 // Start answering process with Web Speech Recognition
 function startAnswering() {
-    if (!recognition) {
-        showStatus('❌ Speech Recognition not available. Please use Chrome or Edge browser.', 'error');
-        return;
-    }
-    
     isAnswering = true;
     answerStartTime = Date.now();
     
     // Clear previous answer
     document.getElementById('answerText').value = '';
     
+    if (!recognition) {
+        startServerSpeechStream()
+            .then(() => {
+                document.getElementById('startAnswerBtn').classList.add('hidden');
+                document.getElementById('endAnswerBtn').classList.remove('hidden');
+                document.getElementById('answerStatus').textContent = '🎤 Listening... Speak your answer now';
+                document.getElementById('answerStatus').className = 'status-message status-success';
+                startSilenceTimer();
+            })
+            .catch(error => {
+                console.error('Server speech stream error:', error);
+                showStatus(`❌ Could not start speech recognition: ${error.message}`, 'error');
+                isAnswering = false;
+            });
+        return;
+    }
+    
     // Update UI
     document.getElementById('answerStatus').textContent = '🎤 Click "Start Answer" to begin speaking...';
     document.getElementById('answerStatus').className = 'status-message status-info';
@@ -356,6 +393,7 @@ function endAnswering() {
     if (recognition && isListening) {
         recognition.stop();
     }
+    stopServerSpeechStream();
     
     isAnswering = false;
     isListening = false;
@@ -384,6 +422,7 @@ function stopListening() {
         recognition.stop();
     }
     isListening = false;
+    stopServerSpeechStream();
     
     // Reset UI
     document.getElementById('startAnswerBtn').classList.remove('hidden');
@@ -446,9 +485,128 @@ window.addEventListener('error', function(e) {
     }
 });
 
+// Live recognition on the server: microphone audio is sent as 16-bit PCM
+// chunks while the candidate speaks, and each response carries the
+// transcript so far (recognized text plus the utterance in progress)
+const PCM_CAPTURE_WORKLET_URL = new URL('pcm-capture-worklet.js', document.currentScript.src).href;
+
+async function startServerSpeechStream() {
+    const mediaStream = await navigator.mediaDevices.getUserMedia({ audio: true });
+    // Native rate: not every browser can open a context at an arbitrary rate,
+    // so the server is told the rate instead
+    const context = new AudioContext();
+    try {
+        await context.audioWorklet.addModule(PCM_CAPTURE_WORKLET_URL);
+    } catch (error) {
+        mediaStream.getTracks().forEach(track => track.stop());
+        context.close();
+        throw error;
+    }
+    
+    const response = await fetch('/api/voice/speech-stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ sample_rate: context.sampleRate })
+    });
+    const stream = await response.json();
+    if (!response.ok) {
+        mediaStream.getTracks().forEach(track => track.stop());
+        context.close();
+        throw new Error(stream.error);
+    }
+    
+    const source = context.createMediaStreamSource(mediaStream);
+    // About a quarter of a second of audio per chunk, whatever the rate
+    const capture = new AudioWorkletNode(context, 'pcm-capture', {
+        channelCount: 1,
+        channelCountMode: 'explicit',
+        processorOptions: { chunkFrames: Math.round(context.sampleRate / 4) }
+    });
+    speechStream = { ...stream, mediaStream, context, source, capture, sending: Promise.resolve(), finishing: null };
+    
+    const current = speechStream;
+    capture.port.onmessage = (event) => {
+        // One request at a time, so chunks arrive in order
+        current.sending = current.sending.then(() => sendSpeechChunk(current, event.data));
+    };
+    source.connect(capture);
+    capture.connect(context.destination);
+}
+
+// The stream endpoints answer 503 with Retry-After when the voice workers
+// are saturated; the chunk (or finish) was not taken and is sent again
+async function fetchSpeechStream(url, options, attempts = 5) {
+    for (let attempt = 1; ; attempt++) {
+        const response = await fetch(url, options);
+        if (response.status !== 503 || attempt >= attempts) return response;
+        const retryAfter = Number(response.headers.get('Retry-After')) || 1;
+        await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+    }
+}
+
+async function sendSpeechChunk(stream, buffer) {
+    if (stream.finishing) return;
+    try {
+        const response = await fetchSpeechStream(stream.chunk_url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/octet-stream' },
+            body: buffer
+        });
+        const result = await response.json();
+        if (!response.ok) {
+            console.error('Speech stream error:', result.error);
+            return;
+        }
+        
+        const answerText = document.getElementById('answerText');
+        const liveText = [result.text, result.partial].filter(Boolean).join(' ');
+        if (liveText && liveText !== answerText.value) {
+            answerText.value = liveText;
+            // Reset silence timer when user speaks
+            resetSilenceTimer();
+        }
+    } catch (error) {
+        console.error('Speech stream error:', error);
+    }
+}
+
+// Stop sending audio and fetch the final transcript; safe to call repeatedly
+function stopServerSpeechStream() {
+    if (!speechStream) return Promise.resolve();
+    if (!speechStream.finishing) {
+        speechStream.finishing = finishServerSpeechStream(speechStream);
+    }
+    return speechStream.finishing;
+}
+
+async function finishServerSpeechStream(stream) {
+    stream.capture.port.onmessage = null;
+    stream.capture.disconnect();
+    stream.source.disconnect();
+    stream.mediaStream.getTracks().forEach(track => track.stop());
+    stream.context.close();
+    
+    try {
+        await stream.sending;
+        const response = await fetchSpeechStream(stream.finish_url, { method: 'POST' });
+        const result = await response.json();
+        if (response.ok && result.text) {
+            document.getElementById('answerText').value = result.text;
+        } else if (!response.ok) {
+            console.error('Speech stream error:', result.error);
+        }
+    } catch (error) {
+        console.error('Speech stream error:', error);
+    } finally {
+        if (speechStream === stream) {
+            speechStream = null;
+        }
+    }
+}
+
 async function processAudioRecording(audioBlob) {
     try {
-        // Convert webm to wav for better compatibility
+        // Sent as recorded (webm/opus); the server transcodes it to 16 kHz mono PCM
         const formData = new FormData();
         formData.append('audio', audioBlob, 'recording.webm');
         
@@ -500,49 +658,36 @@ async function playQuestion() {
         
         showStatus('Loading question audio...', 'info');
         
-        const response = await fetch('/api/voice/text-to-speech', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                text: question
-            })
-        });
-        
-        if (response.ok) {
-            const audioBlob = await response.blob();
-            const audioUrl = URL.createObjectURL(audioBlob);
-            currentAudio = new Audio(audioUrl);
-            
-            // Set up audio event listeners
-            currentAudio.onloadstart = () => {
-                showStatus('Playing question...', 'info');
-                document.getElementById('playBtn').innerHTML = '<i class="fas fa-volume-up"></i>';
-            };
-            
-            currentAudio.onended = () => {
-                showStatus('Question finished. Click "Start Answer" when ready.', 'success');
-                document.getElementById('playBtn').innerHTML = '<i class="fas fa-play"></i>';
-                URL.revokeObjectURL(audioUrl); // Clean up memory
-                currentAudio = null;
-            };
-            
-            currentAudio.onerror = () => {
-                showStatus('Audio playback error', 'error');
-                document.getElementById('playBtn').innerHTML = '<i class="fas fa-play"></i>';
-                currentAudio = null;
-            };
-            
-            // Play the audio with volume control
-            const volumeValue = document.getElementById('volumeControl').value / 100;
-            currentAudio.volume = volumeValue;
-            await currentAudio.play();
-            
-        } else {
-            const result = await response.json();
-            showStatus(`Text-to-speech failed: ${result.error}`, 'error');
-        }
+        // Session question audio is synthesized in the background when the questions are generated.
+        // The audio element plays straight from the URL, so a streamed (not yet cached) response starts
+        // playing as soon as its first chunk arrives, and replays come from the browser cache.
+        const audioUrl = currentSessionId
+            ? `/api/sessions/${currentSessionId}/questions/${currentQuestionIndex}/audio`
+            : '/api/voice/text-to-speech?' + new URLSearchParams({ text: question });
+        currentAudio = new Audio(audioUrl);
+        
+        // Set up audio event listeners
+        currentAudio.onplaying = () => {
+            showStatus('Playing question...', 'info');
+            document.getElementById('playBtn').innerHTML = '<i class="fas fa-volume-up"></i>';
+        };
+        
+        currentAudio.onended = () => {
+            showStatus('Question finished. Click "Start Answer" when ready.', 'success');
+            document.getElementById('playBtn').innerHTML = '<i class="fas fa-play"></i>';
+            currentAudio = null;
+        };
+        
+        currentAudio.onerror = () => {
+            showStatus('Text-to-speech failed: audio could not be loaded', 'error');
+            document.getElementById('playBtn').innerHTML = '<i class="fas fa-play"></i>';
+            currentAudio = null;
+        };
+        
+        // Play the audio with volume control
+        const volumeValue = document.getElementById('volumeControl').value / 100;
+        currentAudio.volume = volumeValue;
+        await currentAudio.play();
     } catch (error) {
         showStatus(`Audio error: ${error.message}`, 'error');
         document.getElementById('playBtn').innerHTML = '<i class="fas fa-play"></i>';
@@ -564,6 +709,8 @@ async function nextQuestion() {
         currentAudio = null;
     }
     
+    // Wait for the final transcript if the answer is still being recognized
+    await stopServerSpeechStream();
     await saveCurrentAnswer();
     currentQuestionIndex++;
     isAnswering = false;
@@ -621,6 +768,7 @@ async function saveCurrentAnswer(answer = null) {
 // Finish interview and get results
 async function finishInterview() {
     try {
+        await stopServerSpeechStream();
         showStatus('Analyzing interview performance...', 'info');
         
         const response = await fetch(`/api/sessions/${currentSessionId}/complete`, {
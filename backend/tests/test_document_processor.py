@@ -0,0 +1,34 @@
+import pytest
+
+from services.document_processor import normalize_text
+
+
+@pytest.mark.parametrize('text', [
+    'I was not able',
+    'more able',
+    'I am able',
+    'y axis',
+    'any one of them',
+    'Anyone can help. I asked any one of them.',
+    'Notable work. I was not able to go.',
+    'the y axis and x axis',
+])
+def test_correct_text_is_not_rejoined(text):
+    normalized, stats = normalize_text(text)
+    assert normalized == text
+    assert stats['repaired_words'] == 0
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('s ecurity and security', 'security and security'),
+    ('tech niques and techniques', 'techniques and techniques'),
+    ('TECHN OLOGIES and technologies', 'TECHNOLOGIES and technologies'),
+])
+def test_split_words_are_rejoined(text, expected):
+    normalized, stats = normalize_text(text)
+    assert normalized == expected
+    assert stats['repaired_words'] == 1
+
+
+def test_split_word_without_whole_occurrence_is_kept():
+    assert normalize_text('s ecurity')[0] == 's ecurity'
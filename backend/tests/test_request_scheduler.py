@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from services.request_scheduler import (
+    PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_STANDARD, RateLimitScheduler, SchedulerBusyError
+)
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not reached'
+        time.sleep(0.005)
+
+
+def queued(scheduler, lane):
+    return scheduler.metrics()['lanes'][lane]['queue_depth']
+
+
+def test_waiting_calls_are_admitted_by_lane_priority():
+    # 10 requests/s once the bucket refills, so admissions are ~100ms apart
+    scheduler = RateLimitScheduler(requests_per_minute=600)
+    scheduler.request_bucket.tokens = -5
+    admitted = []
+
+    def acquire(priority, lane):
+        scheduler.acquire(priority)
+        admitted.append(lane)
+
+    threads = []
+    for priority, lane in ((PRIORITY_BULK, 'bulk'), (PRIORITY_STANDARD, 'standard'),
+                           (PRIORITY_INTERACTIVE, 'interactive')):
+        thread = threading.Thread(target=acquire, args=(priority, lane))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: queued(scheduler, lane) == 1)
+    for thread in threads:
+        thread.join(5)
+
+    assert admitted == ['interactive', 'standard', 'bulk']
+
+
+def test_full_lane_rejects_at_once():
+    scheduler = RateLimitScheduler(requests_per_minute=60, max_queue_depth=1)
+    scheduler.request_bucket.tokens = 0
+    waiting = threading.Thread(target=scheduler.acquire, args=(PRIORITY_BULK,), kwargs={'timeout': 2})
+    waiting.start()
+    wait_until(lambda: queued(scheduler, 'bulk') == 1)
+
+    started = time.monotonic()
+    with pytest.raises(SchedulerBusyError, match='bulk queue is full') as excinfo:
+        scheduler.acquire(PRIORITY_BULK)
+    assert time.monotonic() - started < 0.5
+    assert excinfo.value.retry_after >= 1
+    assert scheduler.metrics()['lanes']['bulk']['rejected'] == 1
+    waiting.join(5)
+
+
+def test_queue_timeout_rejects_and_leaves_queue():
+    scheduler = RateLimitScheduler(requests_per_minute=60)
+    scheduler.request_bucket.tokens = 0
+
+    with pytest.raises(SchedulerBusyError, match='Timed out'):
+        scheduler.acquire(PRIORITY_INTERACTIVE, timeout=0.2)
+
+    lane = scheduler.metrics()['lanes']['interactive']
+    assert lane['queue_depth'] == 0
+    assert lane['rejected'] == 1
+
+
+def test_rate_limited_calls_back_off_and_retry():
+    scheduler = RateLimitScheduler(requests_per_minute=600, max_retries=3, backoff_seconds=0.05)
+    calls = []
+
+    def call():
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            raise RateLimited('429 Too Many Requests')
+        return 'ok'
+
+    assert scheduler.run(call) == 'ok'
+    # Backoff doubles: 50ms, then 100ms
+    assert calls[1] - calls[0] >= 0.05
+    assert calls[2] - calls[1] >= 0.1
+    metrics = scheduler.metrics()
+    assert metrics['rate_limited'] == 2
+    assert metrics['retries'] == 2
+
+
+def test_retries_stop_after_max_retries():
+    scheduler = RateLimitScheduler(requests_per_minute=600, max_retries=1, backoff_seconds=0.01)
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise RateLimited('429 Too Many Requests')
+
+    with pytest.raises(RateLimited):
+        scheduler.run(call)
+    assert len(calls) == 2
+
+
+def test_other_errors_are_not_retried():
+    scheduler = RateLimitScheduler(requests_per_minute=600, backoff_seconds=0.01)
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise ValueError('bad prompt')
+
+    with pytest.raises(ValueError):
+        scheduler.run(call)
+    assert len(calls) == 1
+    assert scheduler.metrics()['retries'] == 0
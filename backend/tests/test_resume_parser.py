@@ -0,0 +1,45 @@
+import pytest
+
+from services.resume_parser import parse_resume, relevant_resume_text
+
+
+RESUME = """Ada Lovelace
+ada@example.com | +44 20 7946 0000
+
+Summary
+I go the extra mile and excel at teamwork. Ten years in the rag trade before moving into software.
+
+Skills
+Go, Excel, Node, TS, Python
+
+Experience
+Built ML pipelines and RAG search in Python, with a JS front end.
+"""
+
+
+@pytest.mark.parametrize('text', [
+    "I go the extra mile and excel at teamwork, after years in the rag trade.",
+    "Every node in the ts and js teams reported to me.",
+])
+def test_everyday_words_are_not_skills(text):
+    assert parse_resume(text)['skills'] == []
+
+
+def test_ambiguous_aliases_match_in_skills_section_and_as_acronyms():
+    skills = parse_resume(RESUME)['skills']
+
+    assert skills[:5] == ['Go', 'Excel', 'Node.js', 'TypeScript', 'Python']
+    assert {'Machine Learning', 'RAG', 'JavaScript'} <= set(skills)
+
+
+def test_relevant_resume_text_drops_contact_header():
+    text = relevant_resume_text(RESUME)
+
+    assert 'ada@example.com' not in text
+    assert text.startswith('Summary\n')
+    assert 'Built ML pipelines' in text
+
+
+def test_relevant_resume_text_without_sections_keeps_everything():
+    text = "Ada Lovelace, analytical engine programmer"
+    assert relevant_resume_text(text) == text
@@ -0,0 +1,88 @@
+import os
+
+import services.score_analytics as score_analytics
+from services.score_analytics import ScoreAnalytics
+
+
+def analysis(score):
+    return {
+        'overall_score': score,
+        'category_scores': {'technical_skills': score, 'communication': None},
+        'confidence_level': 80
+    }
+
+
+def test_completion_appends_to_journal_without_rewriting_snapshot(tmp_path):
+    store = ScoreAnalytics(str(tmp_path / 'scores.npz'))
+    store.rebuild([])
+    snapshot_mtime = os.stat(store.store_path).st_mtime_ns
+
+    store.record('a', 'Engineer', analysis(70))
+    store.record('b', 'engineer ', analysis(90))
+
+    assert os.stat(store.store_path).st_mtime_ns == snapshot_mtime
+    with open(store.journal_path) as f:
+        assert len(f.readlines()) == 2
+
+
+def test_reload_replays_journal(tmp_path):
+    path = str(tmp_path / 'scores.npz')
+    store = ScoreAnalytics(path)
+    store.rebuild([])
+    store.record('a', 'Engineer', analysis(70))
+    store.record('b', 'Designer', analysis(90))
+    store.record('a', 'Engineer', analysis(50))
+    store.remove('b')
+
+    reloaded = ScoreAnalytics(path)
+    assert reloaded.summary() == store.summary()
+    assert reloaded.summary()['count'] == 1
+    assert reloaded.summary('engineer')['columns']['overall_score']['mean'] == 50
+
+
+def test_journal_is_compacted_into_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(score_analytics, 'COMPACT_MIN_ENTRIES', 3)
+    path = str(tmp_path / 'scores.npz')
+    store = ScoreAnalytics(path)
+    store.rebuild([])
+    for index in range(3):
+        store.record(str(index), 'Engineer', analysis(60 + index))
+
+    assert os.path.getsize(store.journal_path) == 0
+    assert ScoreAnalytics(path).summary()['count'] == 3
+
+
+def test_journal_without_snapshot_is_ignored(tmp_path):
+    path = str(tmp_path / 'scores.npz')
+    store = ScoreAnalytics(path)
+    store.record('a', 'Engineer', analysis(70))
+
+    # No snapshot: the store reports empty so it is rebuilt from the sessions
+    assert ScoreAnalytics(path).is_empty()
+
+
+def test_rebuild_skips_fallback_analyses(tmp_path):
+    store = ScoreAnalytics(str(tmp_path / 'scores.npz'))
+    sessions = [
+        {'session_id': 'a', 'status': 'completed', 'job_title': 'Engineer', 'analysis': analysis(90)},
+        {'session_id': 'b', 'status': 'completed', 'job_title': 'Engineer',
+         'analysis': dict(analysis(75), fallback=True)},
+    ]
+
+    assert store.rebuild(sessions) == 1
+    assert store.summary()['columns']['overall_score']['mean'] == 90
+
+
+def test_completed_fallback_session_is_not_recorded(tmp_path):
+    from services.session_manager import InterviewSessionManager
+
+    store = ScoreAnalytics(str(tmp_path / 'scores.npz'))
+    manager = InterviewSessionManager(str(tmp_path / 'sessions'), score_analytics=store)
+    scored = manager.create_session('Ada', 'Engineer')
+    fallback = manager.create_session('Bob', 'Engineer')
+
+    manager.complete_session(scored, analysis(80))
+    manager.complete_session(fallback, dict(analysis(75), fallback=True))
+
+    assert store.summary()['count'] == 1
+    assert manager.get_session(fallback)['status'] == 'completed'
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import services.speech_streams as speech_streams
+from services.speech_streams import SpeechStreams
+from services.worker_pool import BoundedExecutor, WorkerPoolBusy
+
+SAMPLE_RATE = 16000
+
+
+class EchoEngine:
+    name = 'echo'
+
+    def __init__(self):
+        self.calls = 0
+
+    def recognize(self, audio_data):
+        self.calls += 1
+        return f"utterance {self.calls}"
+
+
+def utterance(seed):
+    # One second of tone followed by two seconds of faint noise: a complete utterance
+    rng = np.random.default_rng(seed)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    speech = 8000 * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 8, SAMPLE_RATE)
+    silence = rng.normal(0, 8, 2 * SAMPLE_RATE)
+    return np.concatenate((silence, speech, silence)).astype('<i2').tobytes()
+
+
+def busy_pool():
+    # One worker, no queue, and the worker is occupied until free() is called
+    pool = BoundedExecutor(max_workers=1, max_queue=0, name='voice')
+    release = threading.Event()
+    pool.submit(release.wait, 5)
+
+    def free():
+        release.set()
+        deadline = time.monotonic() + 5
+        while pool.stats()['in_flight']:
+            assert time.monotonic() < deadline, 'pool did not become idle'
+            time.sleep(0.005)
+
+    return pool, free
+
+
+def test_feed_refuses_chunks_beyond_backlog(monkeypatch):
+    monkeypatch.setattr(speech_streams, 'STREAM_MAX_BACKLOG_MS', 1000)
+    pool, free = busy_pool()
+    stream = SpeechStreams(EchoEngine(), pool).create(SAMPLE_RATE)
+
+    state = stream.feed(utterance(0))
+    assert state['segments'] == 1
+    received_ms = state['received_ms']
+
+    with pytest.raises(WorkerPoolBusy):
+        stream.feed(utterance(1))
+    # The refused chunk was not taken, so the client can send it again
+    assert stream.state()['received_ms'] == received_ms
+
+    free()
+    assert stream.feed(utterance(1))['segments'] == 2
+    final = stream.finish(timeout=5)
+    assert final['text'] == 'utterance 1 utterance 2'
+
+
+def test_finish_waits_for_unsubmitted_utterances():
+    pool, free = busy_pool()
+    stream = SpeechStreams(EchoEngine(), pool).create(SAMPLE_RATE)
+    stream.feed(utterance(0))
+
+    with pytest.raises(WorkerPoolBusy):
+        stream.finish(timeout=5)
+
+    free()
+    final = stream.finish(timeout=5)
+    assert final['final'] is True
+    assert final['text'] == 'utterance 1'
+    assert final['pending'] == 0
+
+
+def test_streams_beyond_max_open_are_refused():
+    pool = BoundedExecutor(max_workers=1, max_queue=1, name='voice')
+    streams = SpeechStreams(EchoEngine(), pool, max_open=2)
+    streams.create(SAMPLE_RATE)
+    closed = streams.create(SAMPLE_RATE)
+
+    with pytest.raises(WorkerPoolBusy):
+        streams.create(SAMPLE_RATE)
+    streams.close(closed.stream_id)
+    assert streams.create(SAMPLE_RATE).stream_id != closed.stream_id
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from services.voice_activity import SpeechSegmenter, detect_speech_segments
+
+SAMPLE_RATE = 16000
+
+
+def recording(pattern, seed=0):
+    # 16-bit mono audio from (kind, seconds) pairs: speech is a loud tone, silence is faint noise
+    rng = np.random.default_rng(seed)
+    parts = []
+    for kind, seconds in pattern:
+        count = int(SAMPLE_RATE * seconds)
+        noise = rng.normal(0, 8, count)
+        if kind == 'speech':
+            t = np.arange(count) / SAMPLE_RATE
+            noise += 8000 * np.sin(2 * np.pi * 220 * t)
+        parts.append(noise)
+    return np.concatenate(parts).astype('<i2')
+
+
+def segment_live(samples, chunk_size, max_segment_ms=15000):
+    segmenter = SpeechSegmenter(SAMPLE_RATE, max_segment_ms)
+    segments = []
+    for start in range(0, len(samples), chunk_size):
+        segments.extend(segmenter.push(samples[start:start + chunk_size]))
+    return segments + segmenter.flush()
+
+
+UTTERANCES = [('silence', 1), ('speech', 1), ('silence', 2), ('speech', 0.5), ('silence', 0.4),
+              ('speech', 0.8), ('silence', 2), ('speech', 1.2), ('silence', 1)]
+
+
+@pytest.mark.parametrize('chunk_size', [480, 4000, 12345])
+def test_live_segments_match_whole_recording(chunk_size):
+    samples = recording(UTTERANCES)
+    expected = detect_speech_segments(samples, SAMPLE_RATE)
+
+    assert len(expected) == 3  # the 0.4s pause does not split an utterance
+    assert segment_live(samples, chunk_size) == expected
+
+
+def test_segment_is_returned_once_the_pause_is_long_enough():
+    segmenter = SpeechSegmenter(SAMPLE_RATE, 15000)
+    speech = recording([('silence', 1), ('speech', 1)])
+
+    assert segmenter.push(speech) == []
+    assert segmenter.push(recording([('silence', 0.5)], seed=1)) == []
+    assert segmenter.open_segment() is not None
+    assert len(segmenter.push(recording([('silence', 1)], seed=2))) == 1
+    assert segmenter.open_segment() is None
+
+
+def test_long_utterance_is_cut_at_max_segment():
+    samples = recording([('silence', 1), ('speech', 5), ('silence', 1)])
+    segments = segment_live(samples, 4000, max_segment_ms=2000)
+
+    assert len(segments) == 3
+    assert all(stop - start <= 2 * SAMPLE_RATE for start, stop in segments)
+    # Consecutive pieces neither overlap nor leave a gap
+    assert all(previous[1] == current[0] for previous, current in zip(segments, segments[1:]))
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from services.worker_pool import BoundedExecutor, WorkerPoolBusy
+
+
+def wait_until_idle(pool, timeout=5.0):
+    # Slots are released by a done callback, which may run just after result() returns
+    deadline = time.monotonic() + timeout
+    while pool.stats()['in_flight']:
+        assert time.monotonic() < deadline, 'pool did not become idle'
+        time.sleep(0.005)
+
+
+def saturate(pool):
+    release = threading.Event()
+    futures = [pool.submit(release.wait, 5) for _ in range(pool.max_workers + pool.max_queue)]
+    return release, futures
+
+
+def test_submit_beyond_workers_and_queue_is_rejected():
+    pool = BoundedExecutor(max_workers=2, max_queue=1, name='test', retry_after=3)
+    release, futures = saturate(pool)
+
+    with pytest.raises(WorkerPoolBusy) as excinfo:
+        pool.submit(lambda: None)
+    assert excinfo.value.retry_after == 3
+    assert pool.stats()['in_flight'] == 3
+    assert pool.stats()['rejected'] == 1
+
+    release.set()
+    for future in futures:
+        future.result(5)
+
+
+def test_slots_are_released_when_tasks_finish():
+    pool = BoundedExecutor(max_workers=1, max_queue=1, name='test')
+    release, futures = saturate(pool)
+    release.set()
+    for future in futures:
+        future.result(5)
+    wait_until_idle(pool)
+
+    assert pool.run(lambda: 'done') == 'done'
+
+
+def test_failed_task_releases_its_slot():
+    pool = BoundedExecutor(max_workers=1, max_queue=0, name='test')
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        pool.run(fail)
+    wait_until_idle(pool)
+    assert pool.run(lambda: 'next') == 'next'
+    assert pool.stats()['rejected'] == 0